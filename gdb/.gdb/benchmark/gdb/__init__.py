@@ -0,0 +1,646 @@
+# Stand-in for the gdb Python API used by the pretty-printer benchmarks.
+
+# Only the subset of the API that libcxx/printers.py and
+# eigen/eigen_printers.py touch is implemented.  Values live in a flat
+# bytearray heap, so layouts built by layouts.py look exactly like an
+# inferior to the printers, and every access that real gdb would turn
+# into a target round-trip is counted in `stats'.
+
+import shlex
+import struct
+import sys
+
+TYPE_CODE_PTR = 1
+TYPE_CODE_ARRAY = 2
+TYPE_CODE_STRUCT = 3
+TYPE_CODE_UNION = 4
+TYPE_CODE_ENUM = 5
+TYPE_CODE_FLAGS = 6
+TYPE_CODE_FUNC = 7
+TYPE_CODE_INT = 8
+TYPE_CODE_FLT = 9
+TYPE_CODE_VOID = 10
+TYPE_CODE_CHAR = 20
+TYPE_CODE_BOOL = 21
+TYPE_CODE_TYPEDEF = 23
+TYPE_CODE_REF = 16
+TYPE_CODE_RVALUE_REF = 17
+
+COMMAND_NONE = -1
+COMMAND_DATA = 1
+COMMAND_USER = 13
+COMPLETE_NONE = 0
+COMPLETE_FILENAME = 1
+COMPLETE_SYMBOL = 3
+COMPLETE_EXPRESSION = 5
+
+class error(RuntimeError):
+    pass
+
+class MemoryError(error):
+    pass
+
+class GdbError(Exception):
+    pass
+
+# Counters for everything that would cost a round-trip to the inferior.
+stats = {'fetches': 0, 'reads': 0, 'bytes': 0}
+
+def reset_stats():
+    for key in stats:
+        stats[key] = 0
+
+class Heap(object):
+    "A bytearray standing in for the inferior address space"
+
+    def __init__(self, base=0x10000):
+        self.base = base
+        self.data = bytearray()
+
+    def allocate(self, size, align=16):
+        offset = (len(self.data) + align - 1) // align * align
+        self.data.extend(bytes(offset + max(size, 1) - len(self.data)))
+        return self.base + offset
+
+    def write(self, address, buf):
+        offset = address - self.base
+        self.data[offset:offset + len(buf)] = buf
+
+    def read(self, address, length):
+        offset = address - self.base
+        if address < self.base or offset + length > len(self.data):
+            raise MemoryError('Cannot access memory at address 0x%x' % address)
+        return bytes(self.data[offset:offset + length])
+
+    def clear(self):
+        self.data = bytearray()
+
+heap = Heap()
+
+class Field(object):
+    def __init__(self, name, type, bitpos=0, is_base_class=False,
+                 static_value=None):
+        self.name = name
+        self.type = type
+        self.bitpos = bitpos
+        self.bitsize = 0
+        self.is_base_class = is_base_class
+        self.artificial = False
+        self.static_value = static_value
+
+class Type(object):
+    def __init__(self, code, sizeof, name=None, target=None, fields=(),
+                 template_args=(), signed=True, const=False):
+        self.code = code
+        self.sizeof = sizeof
+        self.name = name
+        self._target = target
+        self._fields = list(fields)
+        self._template_args = list(template_args)
+        self.is_signed = signed
+        self._const = const
+        self._pointer = None
+        self._unqualified = self
+
+    @property
+    def tag(self):
+        if self.code in (TYPE_CODE_STRUCT, TYPE_CODE_UNION, TYPE_CODE_ENUM):
+            return self.name
+        return None
+
+    @property
+    def objfile(self):
+        return None
+
+    def fields(self):
+        if self.code == TYPE_CODE_TYPEDEF:
+            return self._target.fields()
+        if self.code not in (TYPE_CODE_STRUCT, TYPE_CODE_UNION):
+            raise TypeError('Type is not a structure, union, enum, or function type.')
+        return list(self._fields)
+
+    def template_argument(self, n):
+        if n >= len(self._template_args):
+            raise RuntimeError('Template argument number %d out of range.' % n)
+        arg = self._template_args[n]
+        if isinstance(arg, Type):
+            return arg
+        return Value(arg)
+
+    def target(self):
+        if self._target is None:
+            raise RuntimeError('Type does not have a target.')
+        return self._target
+
+    def strip_typedefs(self):
+        typ = self
+        while typ.code == TYPE_CODE_TYPEDEF:
+            typ = typ._target
+        return typ
+
+    def unqualified(self):
+        return self._unqualified
+
+    def const(self):
+        typ = Type(self.code, self.sizeof, self.name, self._target,
+                   self._fields, self._template_args, self.is_signed, True)
+        typ._unqualified = self
+        return typ
+
+    def pointer(self):
+        if self._pointer is None:
+            self._pointer = Type(TYPE_CODE_PTR, 8, target=self, signed=False)
+        return self._pointer
+
+    def reference(self):
+        return Type(TYPE_CODE_REF, 8, target=self)
+
+    def array(self, n1, n2=None):
+        if n2 is None:
+            n1, n2 = 0, n1
+        return Type(TYPE_CODE_ARRAY, self.sizeof * (n2 - n1 + 1),
+                    target=self)
+
+    def __str__(self):
+        prefix = 'const ' if self._const else ''
+        if self.code == TYPE_CODE_PTR:
+            return str(self._target) + ' *'
+        if self.code == TYPE_CODE_REF:
+            return str(self._target) + ' &'
+        if self.code == TYPE_CODE_ARRAY:
+            return '%s [%d]' % (self._target,
+                                self.sizeof // max(self._target.sizeof, 1))
+        return prefix + (self.name or '<anonymous>')
+
+    def __eq__(self, other):
+        if not isinstance(other, Type):
+            return NotImplemented
+        if self is other:
+            return True
+        if self.code != other.code:
+            return False
+        if self.code in (TYPE_CODE_PTR, TYPE_CODE_REF, TYPE_CODE_ARRAY):
+            return self.sizeof == other.sizeof and self._target == other._target
+        return self.name is not None and self.name == other.name
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+_types = {}
+
+def register_type(typ, name=None):
+    _types[name or typ.name] = typ
+    return typ
+
+def lookup_type(name, block=None):
+    try:
+        return _types[name]
+    except KeyError:
+        raise error('No type named %s.' % name)
+
+for _name, _code, _size, _signed in (
+        ('char', TYPE_CODE_INT, 1, True), ('int', TYPE_CODE_INT, 4, True),
+        ('long', TYPE_CODE_INT, 8, True),
+        ('unsigned long', TYPE_CODE_INT, 8, False),
+        ('bool', TYPE_CODE_BOOL, 1, False), ('float', TYPE_CODE_FLT, 4, True),
+        ('double', TYPE_CODE_FLT, 8, True)):
+    register_type(Type(_code, _size, _name, signed=_signed))
+
+def _scalar_format(typ):
+    typ = typ.strip_typedefs()
+    if typ.code == TYPE_CODE_FLT:
+        return {4: 'f', 8: 'd'}[typ.sizeof]
+    if typ.code == TYPE_CODE_BOOL:
+        return '?'
+    fmt = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}[typ.sizeof]
+    if typ.code == TYPE_CODE_PTR or not typ.is_signed:
+        fmt = fmt.upper()
+    return fmt
+
+def _python_type(val):
+    if isinstance(val, bool):
+        return _types['bool']
+    if isinstance(val, int):
+        return _types['long' if val < 1 << 63 else 'unsigned long']
+    if isinstance(val, float):
+        return _types['double']
+    raise TypeError('Could not convert Python object: %r.' % (val,))
+
+class Value(object):
+    def __init__(self, val, type=None, address=None):
+        if isinstance(val, Value):
+            self._type, self._address, self._bytes = \
+                val._type, val._address, val._bytes
+            return
+        if address is not None:
+            self._type, self._address, self._bytes = type, address, None
+            return
+        if type is not None and isinstance(val, (bytes, bytearray, memoryview)):
+            self._type, self._address, self._bytes = type, None, bytes(val)
+            return
+        if type is None:
+            type = _python_type(val)
+        self._type = type
+        self._address = None
+        self._bytes = struct.pack('<' + _scalar_format(type), val)
+
+    @property
+    def type(self):
+        return self._type
+
+    @property
+    def dynamic_type(self):
+        return self._type
+
+    @property
+    def is_optimized_out(self):
+        return False
+
+    @property
+    def address(self):
+        if self._address is None:
+            return None
+        return Value(self._address, self._type.pointer())
+
+    def _raw(self):
+        if self._bytes is not None:
+            return self._bytes
+        stats['fetches'] += 1
+        return heap.read(self._address, self._type.strip_typedefs().sizeof)
+
+    def _scalar(self):
+        typ = self._type.strip_typedefs()
+        if typ.code in (TYPE_CODE_REF, TYPE_CODE_RVALUE_REF):
+            return self.referenced_value()._scalar()
+        if typ.code in (TYPE_CODE_STRUCT, TYPE_CODE_UNION, TYPE_CODE_ARRAY):
+            raise error('Cannot convert value to a number.')
+        return struct.unpack('<' + _scalar_format(typ), self._raw())[0]
+
+    def _field(self, name):
+        typ = self._type.strip_typedefs()
+        if typ.code in (TYPE_CODE_PTR, TYPE_CODE_REF):
+            raise error('Attempt to extract a component of a value '
+                        'that is not a structure pointer.')
+        for field in typ.fields():
+            if field.name == name:
+                if field.static_value is not None:
+                    return Value(field.static_value, field.type)
+                if field.type.code == TYPE_CODE_REF:
+                    # A reference member holds the address of its referent.
+                    address = struct.unpack('<Q', heap.read(
+                        self._address + field.bitpos // 8, 8))[0]
+                    stats['fetches'] += 1
+                    return Value(None, field.type, address)
+                return Value(None, field.type,
+                             self._address + field.bitpos // 8)
+        for field in typ.fields():
+            if field.is_base_class:
+                try:
+                    return Value(None, field.type,
+                                 self._address + field.bitpos // 8)._field(name)
+                except error:
+                    pass
+        raise error('There is no member named %s.' % name)
+
+    def __getitem__(self, key):
+        if isinstance(key, Field):
+            key = key.name
+        if isinstance(key, str):
+            return self._field(key)
+        typ = self._type.strip_typedefs()
+        index = int(key)
+        if typ.code == TYPE_CODE_PTR:
+            target = typ.target()
+            return Value(None, target, self._scalar() + index * target.sizeof)
+        if typ.code == TYPE_CODE_ARRAY:
+            target = typ.target()
+            return Value(None, target, self._address + index * target.sizeof)
+        raise error('Cannot subscript requested type.')
+
+    def dereference(self):
+        typ = self._type.strip_typedefs()
+        if typ.code not in (TYPE_CODE_PTR, TYPE_CODE_REF):
+            raise error('Attempt to take contents of a non-pointer value.')
+        address = self._scalar()
+        if address == 0:
+            raise MemoryError('Cannot access memory at address 0x0')
+        return Value(None, typ.target(), address)
+
+    def referenced_value(self):
+        typ = self._type.strip_typedefs()
+        if typ.code in (TYPE_CODE_REF, TYPE_CODE_RVALUE_REF):
+            return Value(None, typ.target(), self._address)
+        return self.dereference()
+
+    def cast(self, type):
+        src = self._type.strip_typedefs()
+        dst = type.strip_typedefs()
+        if dst.code in (TYPE_CODE_STRUCT, TYPE_CODE_UNION, TYPE_CODE_ARRAY):
+            return Value(None, type, self._address)
+        if src.code == TYPE_CODE_ARRAY:
+            return Value(self._address, type)
+        value = self._scalar()
+        if dst.code == TYPE_CODE_FLT:
+            return Value(float(value), type)
+        if dst.code == TYPE_CODE_BOOL:
+            return Value(bool(value), type)
+        value = int(value) & ((1 << (8 * dst.sizeof)) - 1)
+        if dst.code != TYPE_CODE_PTR and dst.is_signed and \
+                value >> (8 * dst.sizeof - 1):
+            value -= 1 << (8 * dst.sizeof)
+        return Value(value, type)
+
+    reinterpret_cast = cast
+    dynamic_cast = cast
+
+    def fetch_lazy(self):
+        self._bytes = self._raw()
+
+    def string(self, encoding=None, errors=None, length=-1):
+        typ = self._type.strip_typedefs()
+        address = self._scalar() if typ.code == TYPE_CODE_PTR else self._address
+        if length < 0:
+            length = 0
+            while heap.read(address + length, 1) != b'\0':
+                length += 1
+        stats['fetches'] += 1
+        return heap.read(address, length).decode(encoding or 'utf-8',
+                                                 errors or 'strict')
+
+    # Arithmetic follows C: pointer +/- integer scales by the target
+    # size, pointer - pointer yields an element count, and integer
+    # division truncates.
+    def _binop(self, other, op):
+        typ = self._type.strip_typedefs()
+        lhs = self._scalar()
+        rhs = other._scalar() if isinstance(other, Value) else other
+        if typ.code == TYPE_CODE_PTR:
+            size = typ.target().sizeof
+            if isinstance(other, Value) and \
+                    other.type.strip_typedefs().code == TYPE_CODE_PTR:
+                return Value((lhs - rhs) // size)
+            return Value(op(lhs, int(rhs) * size), self._type)
+        result = op(lhs, rhs)
+        if isinstance(result, float) or typ.code == TYPE_CODE_FLT:
+            return Value(float(result))
+        return Value(int(result))
+
+    def __add__(self, other):
+        return self._binop(other, lambda a, b: a + b)
+
+    def __radd__(self, other):
+        return self._binop(other, lambda a, b: a + b)
+
+    def __sub__(self, other):
+        return self._binop(other, lambda a, b: a - b)
+
+    def __rsub__(self, other):
+        return Value(other) - self
+
+    def __mul__(self, other):
+        return self._binop(other, lambda a, b: a * b)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        def div(a, b):
+            if isinstance(a, float) or isinstance(b, float):
+                return a / b
+            return int(a / b)
+        return self._binop(other, div)
+
+    __div__ = __truediv__
+    __floordiv__ = __truediv__
+
+    def __mod__(self, other):
+        return self._binop(other, lambda a, b: a % b)
+
+    def __and__(self, other):
+        return self._binop(other, lambda a, b: a & b)
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        return self._binop(other, lambda a, b: a | b)
+
+    def __lshift__(self, other):
+        return self._binop(other, lambda a, b: a << b)
+
+    def __rshift__(self, other):
+        return self._binop(other, lambda a, b: a >> b)
+
+    def __neg__(self):
+        return Value(-self._scalar())
+
+    def _cmp_operand(self, other):
+        if isinstance(other, Value):
+            return other._scalar()
+        return other
+
+    def __eq__(self, other):
+        return self._scalar() == self._cmp_operand(other)
+
+    def __ne__(self, other):
+        return self._scalar() != self._cmp_operand(other)
+
+    def __lt__(self, other):
+        return self._scalar() < self._cmp_operand(other)
+
+    def __le__(self, other):
+        return self._scalar() <= self._cmp_operand(other)
+
+    def __gt__(self, other):
+        return self._scalar() > self._cmp_operand(other)
+
+    def __ge__(self, other):
+        return self._scalar() >= self._cmp_operand(other)
+
+    __hash__ = None
+
+    def __bool__(self):
+        return bool(self._scalar())
+
+    __nonzero__ = __bool__
+
+    def __int__(self):
+        return int(self._scalar())
+
+    __index__ = __int__
+    __long__ = __int__
+
+    def __float__(self):
+        return float(self._scalar())
+
+    def __str__(self):
+        return self.format_string()
+
+    def format_string(self, raw=False, **kwargs):
+        typ = self._type.strip_typedefs()
+        if not raw:
+            printer = default_visualizer(self)
+            if printer is not None:
+                return _format_printer(printer)
+        if typ.code in (TYPE_CODE_STRUCT, TYPE_CODE_UNION):
+            parts = []
+            for field in typ.fields():
+                if field.static_value is not None:
+                    continue
+                parts.append('%s = %s' % (field.name, self[field.name]))
+            return '{%s}' % ', '.join(parts)
+        if typ.code == TYPE_CODE_ARRAY:
+            count = typ.sizeof // typ.target().sizeof
+            return '{%s}' % ', '.join(str(self[i]) for i in range(count))
+        value = self._scalar()
+        if typ.code == TYPE_CODE_PTR:
+            return '0x%x' % value
+        if typ.code == TYPE_CODE_BOOL:
+            return 'true' if value else 'false'
+        if typ.code == TYPE_CODE_FLT:
+            return repr(value) if typ.sizeof == 8 else '%.9g' % value
+        if typ.sizeof == 1:
+            return "%d '%s'" % (value, chr(value & 0xff))
+        return str(value)
+
+    def __repr__(self):
+        return '<gdb.Value %s>' % self.format_string(raw=True)
+
+def _format_printer(printer):
+    text = printer.to_string() if hasattr(printer, 'to_string') else None
+    if isinstance(text, Value):
+        text = str(text)
+    if not hasattr(printer, 'children'):
+        return text
+    limit = parameter('print elements')
+    children = []
+    for index, (name, child) in enumerate(printer.children()):
+        if limit and index >= limit:
+            children.append('...')
+            break
+        children.append('%s = %s' % (name, child))
+    body = '{%s}' % ', '.join(children)
+    return body if text is None else '%s %s' % (text, body)
+
+class Inferior(object):
+    num = 1
+    pid = 1
+
+    def read_memory(self, address, length):
+        stats['reads'] += 1
+        stats['bytes'] += int(length)
+        return memoryview(heap.read(int(address), int(length)))
+
+    def write_memory(self, address, buf, length=None):
+        heap.write(int(address), bytes(buf)[:length])
+
+    def threads(self):
+        return ()
+
+_inferior = Inferior()
+
+def selected_inferior():
+    return _inferior
+
+def inferiors():
+    return (_inferior,)
+
+_parameters = {
+    'print elements': 200,
+    'print pretty': False,
+}
+
+def parameter(name):
+    return _parameters[name]
+
+def set_parameter(name, value):
+    _parameters[name] = value
+
+def execute(command, from_tty=False, to_string=False):
+    text = ''
+    if command == 'show endian':
+        text = 'The target endianness is set automatically ' \
+               '(currently little endian).\n'
+    elif command.startswith('set print elements '):
+        limit = command.split()[-1]
+        set_parameter('print elements',
+                      None if limit in ('0', 'unlimited') else int(limit))
+    if to_string:
+        return text
+    sys.stdout.write(text)
+
+def write(text, stream=None):
+    sys.stdout.write(text)
+
+def flush(stream=None):
+    sys.stdout.flush()
+
+# Symbols visible to parse_and_eval, filled in by the layout builders.
+symbols = {}
+
+def parse_and_eval(expression):
+    try:
+        return symbols[expression.strip()]
+    except KeyError:
+        raise error('No symbol "%s" in current context.' % expression)
+
+def string_to_argv(arg):
+    return shlex.split(arg)
+
+pretty_printers = []
+
+def default_visualizer(value):
+    for function in pretty_printers:
+        printer = function(value)
+        if printer is not None:
+            return printer
+    return None
+
+def current_objfile():
+    return None
+
+def objfiles():
+    return []
+
+def current_progspace():
+    return None
+
+class Command(object):
+    def __init__(self, name, command_class, completer_class=COMPLETE_NONE,
+                 prefix=False):
+        self._name = name
+        commands[name] = self
+
+    def dont_repeat(self):
+        pass
+
+commands = {}
+
+class Parameter(object):
+    def __init__(self, name, command_class, parameter_class, enum=None):
+        self.value = None
+
+class _EventRegistry(object):
+    def __init__(self):
+        self._listeners = []
+
+    def connect(self, function):
+        self._listeners.append(function)
+
+    def disconnect(self, function):
+        self._listeners.remove(function)
+
+    def emit(self, event=None):
+        for function in list(self._listeners):
+            function(event)
+
+class _Events(object):
+    def __init__(self):
+        for name in ('stop', 'cont', 'exited', 'new_objfile',
+                     'clear_objfiles', 'memory_changed', 'register_changed',
+                     'breakpoint_created', 'breakpoint_modified',
+                     'breakpoint_deleted', 'before_prompt'):
+            setattr(self, name, _EventRegistry())
+
+events = _Events()
@@ -0,0 +1,532 @@
+# Synthesize libc++ and Eigen object layouts in the fake gdb heap.
+
+# Each builder allocates the container (and everything it points to)
+# in gdb.heap, registers the nested types the printers look up by name
+# and returns an lvalue gdb.Value, just like `parse_and_eval' would in
+# a real session.
+
+import random
+import struct
+
+import gdb
+
+char = gdb.lookup_type('char')
+int_ = gdb.lookup_type('int')
+long_ = gdb.lookup_type('long')
+size_t = gdb.lookup_type('unsigned long')
+bool_ = gdb.lookup_type('bool')
+float_ = gdb.lookup_type('float')
+double = gdb.lookup_type('double')
+
+scalars = {
+    'char': char, 'int': int_, 'long': long_, 'size_t': size_t,
+    'bool': bool_, 'float': float_, 'double': double,
+}
+
+_formats = {'char': 'b', 'int': 'i', 'long': 'q', 'unsigned long': 'Q',
+            'bool': '?', 'float': 'f', 'double': 'd'}
+
+def _alignof(typ):
+    typ = typ.strip_typedefs()
+    if typ.code == gdb.TYPE_CODE_ARRAY:
+        return _alignof(typ.target())
+    if typ.code in (gdb.TYPE_CODE_STRUCT, gdb.TYPE_CODE_UNION):
+        return max([_alignof(f.type) for f in typ.fields()
+                    if f.static_value is None] or [1])
+    return min(typ.sizeof, 8) or 1
+
+def struct_type(name, members, bases=(), statics=(), template_args=()):
+    "Lay out a C++ struct with natural alignment and register it"
+    fields = []
+    offset = 0
+    for base in bases:
+        offset = (offset + _alignof(base) - 1) // _alignof(base) * _alignof(base)
+        fields.append(gdb.Field(base.name, base, offset * 8, is_base_class=True))
+        offset += base.sizeof
+    for fname, ftype in members:
+        align = _alignof(ftype)
+        offset = (offset + align - 1) // align * align
+        fields.append(gdb.Field(fname, ftype, offset * 8))
+        offset += ftype.sizeof
+    for fname, ftype, value in statics:
+        fields.append(gdb.Field(fname, ftype, static_value=value))
+    align = max([_alignof(f.type) for f in fields
+                 if f.static_value is None] or [1])
+    size = (offset + align - 1) // align * align
+    typ = gdb.Type(gdb.TYPE_CODE_STRUCT, size, name, fields=fields,
+                   template_args=template_args)
+    return gdb.register_type(typ)
+
+def typedef(name, target):
+    return gdb.register_type(gdb.Type(gdb.TYPE_CODE_TYPEDEF, target.sizeof,
+                                      name, target=target))
+
+def _offset(typ, name):
+    "Byte offset of member NAME in TYP, searching base classes too"
+    for field in typ.strip_typedefs().fields():
+        if field.name == name:
+            return field.bitpos // 8
+    for field in typ.strip_typedefs().fields():
+        if field.is_base_class:
+            try:
+                return field.bitpos // 8 + _offset(field.type, name)
+            except KeyError:
+                pass
+    raise KeyError(name)
+
+def _store(address, typ, value):
+    gdb.heap.write(address, struct.pack('<' + _format(typ), value))
+
+def _format(typ):
+    typ = typ.strip_typedefs()
+    if typ.code in (gdb.TYPE_CODE_PTR, gdb.TYPE_CODE_REF):
+        return 'Q'
+    return _formats[typ.name]
+
+def _store_field(address, typ, path, value):
+    "Store VALUE into the (possibly nested) member PATH of a TYP object"
+    for name in path.split('.'):
+        for field in typ.strip_typedefs().fields():
+            if field.name == name:
+                address += field.bitpos // 8
+                typ = field.type
+                break
+        else:
+            raise KeyError(name)
+    _store(address, typ, value)
+
+def _pack(typ, values):
+    return struct.pack('<%d%s' % (len(values), _format(typ)), *values)
+
+def sample(typ, count, seed=0):
+    "Deterministic pseudo-random sample values of scalar type TYP"
+    rng = random.Random(seed)
+    if typ.code == gdb.TYPE_CODE_FLT:
+        return [rng.uniform(-1e3, 1e3) for _ in range(count)]
+    if typ.code == gdb.TYPE_CODE_BOOL:
+        return [rng.random() < 0.5 for _ in range(count)]
+    bits = 8 * typ.sizeof - (1 if typ.is_signed else 0)
+    return [rng.randrange(0, 1 << min(bits, 31)) for _ in range(count)]
+
+def _allocator(elt):
+    return struct_type('std::__1::allocator<%s>' % elt, [])
+
+def _object(typ, symbol):
+    address = gdb.heap.allocate(typ.sizeof)
+    value = gdb.Value(None, typ, address)
+    if symbol:
+        gdb.symbols[symbol] = value
+    return value
+
+def vector(elt, values, symbol=None):
+    name = 'std::__1::vector<%s, %s>' % (elt, _allocator(elt).name)
+    cap = struct_type('std::__1::__compressed_pair<%s *, %s>'
+                      % (elt, _allocator(elt).name),
+                      [('__first_', elt.pointer())])
+    typ = struct_type(name, [('__begin_', elt.pointer()),
+                             ('__end_', elt.pointer()),
+                             ('__end_cap_', cap)],
+                      template_args=[elt])
+    data = gdb.heap.allocate(len(values) * elt.sizeof)
+    gdb.heap.write(data, _pack(elt, values))
+    obj = _object(typ, symbol)
+    _store_field(obj._address, typ, '__begin_', data)
+    _store_field(obj._address, typ, '__end_', data + len(values) * elt.sizeof)
+    _store_field(obj._address, typ, '__end_cap_.__first_',
+                 data + len(values) * elt.sizeof)
+    return obj
+
+def vector_bool(values, symbol=None):
+    word = size_t
+    name = 'std::__1::vector<bool, %s>' % _allocator(bool_).name
+    cap = struct_type('std::__1::__compressed_pair<unsigned long, %s>'
+                      % _allocator(word).name, [('__first_', word)])
+    typ = struct_type(name, [('__begin_', word.pointer()),
+                             ('__size_', word),
+                             ('__cap_alloc_', cap)],
+                      statics=[('__bits_per_word', int_, 64)],
+                      template_args=[bool_])
+    words = [0] * ((len(values) + 63) // 64)
+    for i, bit in enumerate(values):
+        if bit:
+            words[i // 64] |= 1 << (i % 64)
+    data = gdb.heap.allocate(len(words) * 8)
+    gdb.heap.write(data, _pack(word, words))
+    obj = _object(typ, symbol)
+    _store_field(obj._address, typ, '__begin_', data)
+    _store_field(obj._address, typ, '__size_', len(values))
+    _store_field(obj._address, typ, '__cap_alloc_.__first_', len(words))
+    return obj
+
+def bitset(values, symbol=None):
+    words = [0] * ((len(values) + 63) // 64)
+    for i, bit in enumerate(values):
+        if bit:
+            words[i // 64] |= 1 << (i % 64)
+    base = struct_type('std::__1::__bitset<%d, %d>' % (len(words), len(values)),
+                       [('__first_', size_t.array(len(words) - 1))],
+                       statics=[('__n_words', int_, len(words)),
+                                ('__bits_per_word', int_, 64)])
+    typ = struct_type('std::__1::bitset<%d>' % len(values), [], bases=[base],
+                      template_args=[len(values)])
+    obj = _object(typ, symbol)
+    gdb.heap.write(obj._address, _pack(size_t, words))
+    return obj
+
+def deque(elt, values, symbol=None, start=None):
+    block_size = 4096 // elt.sizeof if elt.sizeof < 256 else 16
+    if start is None:
+        start = block_size // 2
+    pointer = elt.pointer()
+    split = struct_type('std::__1::__split_buffer<%s *, %s>'
+                        % (elt, _allocator(pointer).name),
+                        [('__first_', pointer.pointer()),
+                         ('__begin_', pointer.pointer()),
+                         ('__end_', pointer.pointer()),
+                         ('__end_cap_', pointer.pointer())])
+    size = struct_type('std::__1::__compressed_pair<unsigned long, %s>'
+                       % _allocator(elt).name, [('__first_', size_t)])
+    name = 'std::__1::deque<%s, %s>' % (elt, _allocator(elt).name)
+    typ = struct_type(name, [('__map_', split),
+                             ('__start_', size_t),
+                             ('__size_', size)],
+                      statics=[('__block_size', long_, block_size)],
+                      template_args=[elt])
+    nblocks = (start + len(values) + block_size - 1) // block_size
+    blocks = []
+    for b in range(nblocks):
+        block = gdb.heap.allocate(block_size * elt.sizeof)
+        lo = max(b * block_size - start, 0)
+        hi = min((b + 1) * block_size - start, len(values))
+        if hi > lo:
+            first = (lo + start) % block_size
+            gdb.heap.write(block + first * elt.sizeof, _pack(elt, values[lo:hi]))
+        blocks.append(block)
+    block_map = gdb.heap.allocate(max(nblocks, 1) * 8)
+    gdb.heap.write(block_map, _pack(pointer, blocks))
+    obj = _object(typ, symbol)
+    _store_field(obj._address, typ, '__map_.__first_', block_map)
+    _store_field(obj._address, typ, '__map_.__begin_', block_map)
+    _store_field(obj._address, typ, '__map_.__end_', block_map + nblocks * 8)
+    _store_field(obj._address, typ, '__map_.__end_cap_', block_map + nblocks * 8)
+    _store_field(obj._address, typ, '__start_', start)
+    _store_field(obj._address, typ, '__size_.__first_', len(values))
+    return obj
+
+def list_(elt, values, symbol=None):
+    base = struct_type('std::__1::__list_node_base<%s, void *>' % elt, [])
+    base._fields = [gdb.Field('__prev_', base.pointer(), 0),
+                    gdb.Field('__next_', base.pointer(), 64)]
+    base.sizeof = 16
+    node = struct_type('std::__1::__list_node<%s, void *>' % elt,
+                       [('__value_', elt)], bases=[base])
+    size = struct_type('std::__1::__compressed_pair<unsigned long, %s>'
+                       % _allocator(node).name, [('__first_', size_t)])
+    name = 'std::__1::list<%s, %s>' % (elt, _allocator(elt).name)
+    typ = struct_type(name, [('__end_', base), ('__size_alloc_', size)],
+                      template_args=[elt])
+    typedef(name + '::__node', node)
+    obj = _object(typ, symbol)
+    end = obj._address
+    prev = end
+    value_offset = _offset(node, '__value_')
+    for value in values:
+        address = gdb.heap.allocate(node.sizeof)
+        _store(address + value_offset, elt, value)
+        _store(address, base.pointer(), prev)
+        _store(prev + 8, base.pointer(), address)
+        prev = address
+    _store(end, base.pointer(), prev)
+    _store(prev + 8, base.pointer(), end)
+    _store_field(end, typ, '__size_alloc_.__first_', len(values))
+    return obj
+
+def _tree(name, value_type, items, symbol):
+    "A balanced libc++ __tree holding ITEMS (already in key order)"
+    end_node = struct_type('std::__1::__tree_end_node<%s *>' % name, [])
+    end_node.sizeof = 8
+    node_base = struct_type('std::__1::__tree_node_base<void *>',
+                            [('__right_', end_node.pointer()),
+                             ('__parent_', end_node.pointer()),
+                             ('__is_black_', bool_)], bases=[end_node])
+    # Links point at the node base, as in the libc++ the printers target.
+    end_node._fields = [gdb.Field('__left_', node_base.pointer(), 0)]
+    for field in node_base._fields[1:3]:
+        field.type = node_base.pointer()
+    node = struct_type('std::__1::__tree_node<%s, void *>' % value_type,
+                       [('__value_', value_type)], bases=[node_base])
+    nodeptr = node.pointer()
+    pair1 = struct_type('std::__1::__compressed_pair<%s, %s>'
+                        % (end_node.name, _allocator(node).name),
+                        [('__first_', end_node)])
+    pair3 = struct_type('std::__1::__compressed_pair<unsigned long, %s>'
+                        % name, [('__first_', size_t)])
+    tree = struct_type('std::__1::__tree<%s>' % name,
+                       [('__begin_node_', nodeptr),
+                        ('__pair1_', pair1),
+                        ('__pair3_', pair3)])
+    typ = struct_type(name, [('__tree_', tree)], template_args=[value_type])
+    obj = _object(typ, symbol)
+    end = obj._address + _offset(tree, '__pair1_')
+    addresses = []
+    for item in items:
+        address = gdb.heap.allocate(node.sizeof)
+        item(address + _offset(node, '__value_'))
+        addresses.append(address)
+
+    left, right, parent = (_offset(node, '__left_'), _offset(node, '__right_'),
+                           _offset(node, '__parent_'))
+    def build(lo, hi, up):
+        if lo >= hi:
+            return 0
+        mid = (lo + hi) // 2
+        here = addresses[mid]
+        _store(here + parent, nodeptr, up)
+        _store(here + left, nodeptr, build(lo, mid, here))
+        _store(here + right, nodeptr, build(mid + 1, hi, here))
+        return here
+
+    _store(end, nodeptr, build(0, len(addresses), end))
+    _store_field(obj._address, typ, '__tree_.__begin_node_',
+                 addresses[0] if addresses else end)
+    _store_field(obj._address, typ, '__tree_.__pair3_.__first_', len(items))
+    return obj
+
+def map_(key, mapped, keys, values, symbol=None):
+    pair = struct_type('std::__1::pair<const %s, %s>' % (key, mapped),
+                       [('first', key), ('second', mapped)],
+                       template_args=[key, mapped])
+    value_type = struct_type('std::__1::__value_type<%s, %s>' % (key, mapped),
+                             [('__cc', pair)])
+    name = 'std::__1::map<%s, %s, std::__1::less<%s>, %s>' \
+           % (key, mapped, key, _allocator(pair).name)
+    first, second = _offset(pair, 'first'), _offset(pair, 'second')
+
+    def item(k, v):
+        def store(address):
+            _store(address + first, key, k)
+            _store(address + second, mapped, v)
+        return store
+
+    order = sorted(range(len(keys)), key=lambda i: keys[i])
+    return _tree(name, value_type,
+                 [item(keys[i], values[i]) for i in order], symbol)
+
+def set_(key, keys, symbol=None):
+    name = 'std::__1::set<%s, std::__1::less<%s>, %s>' \
+           % (key, key, _allocator(key).name)
+
+    def item(k):
+        return lambda address: _store(address, key, k)
+
+    return _tree(name, key, [item(k) for k in sorted(keys)], symbol)
+
+def unordered_map(key, mapped, keys, values, symbol=None):
+    pair = struct_type('std::__1::pair<const %s, %s>' % (key, mapped),
+                       [('first', key), ('second', mapped)])
+    first_node = struct_type('std::__1::__hash_node_base<%s>' % pair, [])
+    first_node.sizeof = 8
+    node = struct_type('std::__1::__hash_node<%s, void *>' % pair,
+                       [('__hash_', size_t), ('__value_', pair)],
+                       bases=[first_node])
+    first_node._fields = [gdb.Field('__next_', node.pointer(), 0)]
+    p1 = struct_type('std::__1::__compressed_pair<%s, %s>'
+                     % (first_node.name, _allocator(node).name),
+                     [('__first_', first_node)])
+    p2 = struct_type('std::__1::__compressed_pair<unsigned long, hasher>',
+                     [('__first_', size_t)])
+    table = struct_type('std::__1::__hash_table<%s>' % pair,
+                        [('__bucket_list_', size_t),
+                         ('__p1_', p1), ('__p2_', p2)])
+    name = 'std::__1::unordered_map<%s, %s, std::__1::hash<%s>, ' \
+           'std::__1::equal_to<%s>, %s>' \
+           % (key, mapped, key, key, _allocator(pair).name)
+    typ = struct_type(name, [('__table_', table)], template_args=[key, mapped])
+    obj = _object(typ, symbol)
+    nodeptr = first_node.pointer()
+    link = obj._address + _offset(table, '__p1_')
+    value_offset = _offset(node, '__value_')
+    for k, v in zip(keys, values):
+        address = gdb.heap.allocate(node.sizeof)
+        _store(address + value_offset + _offset(pair, 'first'), key, k)
+        _store(address + value_offset + _offset(pair, 'second'), mapped, v)
+        _store(link, nodeptr, address)
+        link = address
+    _store(link, nodeptr, 0)
+    _store_field(obj._address, typ, '__table_.__p2_.__first_', len(keys))
+    return obj
+
+def _eigen_dim(n):
+    return -1 if n is None else n
+
+def eigen_matrix(scalar, rows, cols, values, row_major=False, fixed=False,
+                 variety='Matrix', symbol=None):
+    options = 1 if row_major else 0
+    r, c = (rows, cols) if fixed else (None, None)
+    args = '%s, %d, %d, %d, %d, %d' % (scalar, _eigen_dim(r), _eigen_dim(c),
+                                      options, _eigen_dim(r), _eigen_dim(c))
+    if fixed:
+        plain = struct_type('Eigen::internal::plain_array<%s, %d, %d, 16>'
+                            % (scalar, rows * cols, options),
+                            [('array', scalar.array(rows * cols - 1))])
+        storage = struct_type('Eigen::DenseStorage<%s, %d, %d, %d, %d>'
+                              % (scalar, rows * cols, rows, cols, options),
+                              [('m_data', plain)])
+    else:
+        storage = struct_type('Eigen::DenseStorage<%s, -1, -1, -1, %d>'
+                              % (scalar, options),
+                              [('m_data', scalar.pointer()),
+                               ('m_rows', long_), ('m_cols', long_)])
+    base = struct_type('Eigen::PlainObjectBase<Eigen::%s<%s> >'
+                       % (variety, args), [('m_storage', storage)])
+    typ = struct_type('Eigen::%s<%s>' % (variety, args), [], bases=[base],
+                      template_args=[scalar])
+    obj = _object(typ, symbol)
+    if fixed:
+        gdb.heap.write(obj._address, _pack(scalar, values))
+    else:
+        data = gdb.heap.allocate(len(values) * scalar.sizeof)
+        gdb.heap.write(data, _pack(scalar, values))
+        _store_field(obj._address, storage, 'm_data', data)
+        _store_field(obj._address, storage, 'm_rows', rows)
+        _store_field(obj._address, storage, 'm_cols', cols)
+    return obj
+
+def _variable_if_dynamic(n):
+    "Eigen::internal::variable_if_dynamic<long, N>, holding a value only if N is Dynamic"
+    members = [('m_value', long_)] if n is None else []
+    return struct_type('Eigen::internal::variable_if_dynamic<long, %d>'
+                       % _eigen_dim(n), members)
+
+def _map_base(name, scalar, rows, cols, members, template_args, symbol):
+    base = struct_type('Eigen::MapBase<%s, 0>' % name,
+                       [('m_data', scalar.pointer()),
+                        ('m_rows', _variable_if_dynamic(rows)),
+                        ('m_cols', _variable_if_dynamic(cols))])
+    typ = struct_type(name, members, bases=[base], template_args=template_args)
+    return _object(typ, symbol), base
+
+def eigen_map(matrix, rows, cols, data, inner=0, outer=0, symbol=None):
+    """Eigen::Map of the plain type of MATRIX over DATA, with dynamic
+    extents and the compile time strides INNER and OUTER, None standing
+    for Dynamic and 0 for the default stride"""
+    plain = matrix.type
+    stride = struct_type('Eigen::Stride<%d, %d>' % (_eigen_dim(outer), _eigen_dim(inner)),
+                         [('m_outer', _variable_if_dynamic(outer)),
+                          ('m_inner', _variable_if_dynamic(inner))])
+    scalar = plain.template_argument(0)
+    name = 'Eigen::Map<%s, 0, %s>' % (plain, stride)
+    obj, base = _map_base(name, scalar, None, None, [('m_stride', stride)],
+                          [plain], symbol)
+    _store_field(obj._address, base, 'm_data', data)
+    _store_field(obj._address, base, 'm_rows.m_value', rows)
+    _store_field(obj._address, base, 'm_cols.m_value', cols)
+    return obj
+
+def eigen_strided_map(matrix, rows, cols, data, inner, outer, symbol=None):
+    "Eigen::Map with dynamic inner and outer strides"
+    obj = eigen_map(matrix, rows, cols, data, None, None, symbol)
+    _store_field(obj._address, obj.type, 'm_stride.m_inner.m_value', inner)
+    _store_field(obj._address, obj.type, 'm_stride.m_outer.m_value', outer)
+    return obj
+
+def eigen_block(xpr, start_row, start_col, rows, cols, symbol=None):
+    "Eigen::Block<XprType, Dynamic, Dynamic> of the plain matrix XPR"
+    scalar = xpr.type.template_argument(0)
+    storage = xpr['m_storage']
+    row_major = ', 1, ' in xpr.type.name
+    outer_stride = int(storage['m_cols'] if row_major else storage['m_rows'])
+    name = 'Eigen::Block<%s, -1, -1, false>' % xpr.type
+    obj, base = _map_base(name, scalar, None, None,
+                          [('m_xpr', xpr.type.reference()),
+                           ('m_startRow', _variable_if_dynamic(None)),
+                           ('m_startCol', _variable_if_dynamic(None)),
+                           ('m_outerStride', long_)],
+                          [xpr.type], symbol)
+    if row_major:
+        offset = start_row * outer_stride + start_col
+    else:
+        offset = start_col * outer_stride + start_row
+    _store_field(obj._address, base, 'm_data',
+                 int(storage['m_data']) + offset * scalar.sizeof)
+    _store_field(obj._address, base, 'm_rows.m_value', rows)
+    _store_field(obj._address, base, 'm_cols.m_value', cols)
+    _store_field(obj._address, obj.type, 'm_xpr', xpr._address)
+    _store_field(obj._address, obj.type, 'm_startRow.m_value', start_row)
+    _store_field(obj._address, obj.type, 'm_startCol.m_value', start_col)
+    _store_field(obj._address, obj.type, 'm_outerStride', outer_stride)
+    return obj
+
+def eigen_sparse(scalar, rows, cols, entries, row_major=False,
+                 compressed=True, symbol=None):
+    """Eigen::SparseMatrix holding ENTRIES, a dict of (row, col) to value.
+    Uncompressed matrices get a spare slot at the end of every line."""
+    options = 1 if row_major else 0
+    outer_size, inner_size = (rows, cols) if row_major else (cols, rows)
+    lines = [[] for _ in range(outer_size)]
+    for (row, col), value in sorted(entries.items()):
+        outer, inner = (row, col) if row_major else (col, row)
+        lines[outer].append((inner, value))
+
+    outer_index = [0]
+    indices = []
+    values = []
+    for line in lines:
+        line.sort()
+        indices.extend(inner for inner, _ in line)
+        values.extend(value for _, value in line)
+        if not compressed:
+            indices.append(0)
+            values.append(0)
+        outer_index.append(len(indices))
+
+    storage = struct_type('Eigen::internal::CompressedStorage<%s, int>' % scalar,
+                          [('m_values', scalar.pointer()),
+                           ('m_indices', int_.pointer()),
+                           ('m_size', long_), ('m_allocatedSize', long_)])
+    typ = struct_type('Eigen::SparseMatrix<%s, %d, int>' % (scalar, options),
+                      [('m_outerSize', long_), ('m_innerSize', long_),
+                       ('m_outerIndex', int_.pointer()),
+                       ('m_innerNonZeros', int_.pointer()),
+                       ('m_data', storage)],
+                      template_args=[scalar])
+    obj = _object(typ, symbol)
+
+    def array(typ, items):
+        address = gdb.heap.allocate(max(len(items), 1) * typ.sizeof)
+        gdb.heap.write(address, _pack(typ, items))
+        return address
+
+    _store_field(obj._address, typ, 'm_outerSize', outer_size)
+    _store_field(obj._address, typ, 'm_innerSize', inner_size)
+    _store_field(obj._address, typ, 'm_outerIndex', array(int_, outer_index))
+    if not compressed:
+        _store_field(obj._address, typ, 'm_innerNonZeros',
+                     array(int_, [len(line) for line in lines]))
+    _store_field(obj._address, typ, 'm_data.m_values', array(scalar, values))
+    _store_field(obj._address, typ, 'm_data.m_indices', array(int_, indices))
+    _store_field(obj._address, typ, 'm_data.m_size', len(values))
+    _store_field(obj._address, typ, 'm_data.m_allocatedSize', len(values))
+    return obj
+
+def eigen_tensor(scalar, dimensions, values, row_major=False, symbol=None):
+    "Eigen::Tensor with the given DIMENSIONS"
+    options = 1 if row_major else 0
+    rank = len(dimensions)
+    array = struct_type('Eigen::array<long, %d>' % rank,
+                        [('values', long_.array(max(rank, 1) - 1))])
+    sizes = struct_type('Eigen::DSizes<long, %d>' % rank, [], bases=[array])
+    storage = struct_type('Eigen::TensorStorage<%s, Eigen::DSizes<long, %d>, %d>'
+                          % (scalar, rank, options),
+                          [('m_data', scalar.pointer()),
+                           ('m_dimensions', sizes)])
+    typ = struct_type('Eigen::Tensor<%s, %d, %d, long>' % (scalar, rank, options),
+                      [('m_storage', storage)], template_args=[scalar])
+    obj = _object(typ, symbol)
+    data = gdb.heap.allocate(len(values) * scalar.sizeof)
+    gdb.heap.write(data, _pack(scalar, values))
+    _store_field(obj._address, typ, 'm_storage.m_data', data)
+    address = obj._address + _offset(storage, 'm_dimensions') + \
+        _offset(typ, 'm_storage')
+    gdb.heap.write(address, _pack(long_, dimensions))
+    return obj
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Benchmark the libc++ and Eigen pretty-printers without a debuggee.
+
+# The `gdb' package next to this script stands in for gdb's Python
+# API, so the printers run unmodified against containers synthesized
+# by layouts.py.  For every case the full child sequence is walked and
+# formatted the way `print' would, and we report throughput together
+# with the number of simulated inferior accesses and the peak Python
+# memory.
+#
+#   python3 run.py                      # every case at the default size
+#   python3 run.py -n 1000000 vector    # one case, a million elements
+#   python3 run.py --limit 200          # honour `set print elements 200'
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _here)
+sys.path.insert(1, os.path.join(_here, '..', 'libc++'))
+sys.path.insert(2, os.path.join(_here, '..', 'eigen'))
+
+import gdb
+import layouts
+
+from libcxx.printers import register_libcxx_printers
+from eigen_printers import register_eigen_printers
+
+register_libcxx_printers(None)
+register_eigen_printers(None)
+
+def _square(n):
+    side = max(int(n ** 0.5), 1)
+    return side, side
+
+def _vector(elt):
+    return lambda n: layouts.vector(elt, layouts.sample(elt, n))
+
+def _matrix(n, row_major=False):
+    rows, cols = _square(n)
+    return layouts.eigen_matrix(layouts.double, rows, cols,
+                                layouts.sample(layouts.double, rows * cols),
+                                row_major=row_major)
+
+def _block(n):
+    # A square block in the middle of a parent sixteen times its size
+    rows, cols = _square(n)
+    parent = layouts.eigen_matrix(layouts.double, 4 * rows, 4 * cols,
+                                  layouts.sample(layouts.double, 16 * rows * cols))
+    return layouts.eigen_block(parent, rows, cols, rows, cols)
+
+def _sparse(n):
+    rows, cols = _square(4 * n)
+    positions = layouts.sample(layouts.int_, n)
+    entries = dict(((p % rows, p // rows % cols), float(p)) for p in positions)
+    return layouts.eigen_sparse(layouts.double, rows, cols, entries)
+
+def _tensor(n):
+    side = max(int(round(n ** (1. / 3))), 1)
+    return layouts.eigen_tensor(layouts.double, [side] * 3,
+                                layouts.sample(layouts.double, side ** 3))
+
+def _map(n):
+    keys = list(range(n))
+    return layouts.map_(layouts.int_, layouts.double, keys,
+                        layouts.sample(layouts.double, n))
+
+def _unordered_map(n):
+    keys = list(range(n))
+    return layouts.unordered_map(layouts.int_, layouts.double, keys,
+                                 layouts.sample(layouts.double, n))
+
+cases = {
+    'vector': _vector(layouts.double),
+    'vector-int': _vector(layouts.int_),
+    'vector-bool': lambda n: layouts.vector_bool(layouts.sample(layouts.bool_, n)),
+    'deque': lambda n: layouts.deque(layouts.double,
+                                     layouts.sample(layouts.double, n)),
+    'list': lambda n: layouts.list_(layouts.int_, layouts.sample(layouts.int_, n)),
+    'set': lambda n: layouts.set_(layouts.int_, list(range(n))),
+    'map': _map,
+    'unordered-map': _unordered_map,
+    'bitset': lambda n: layouts.bitset(layouts.sample(layouts.bool_, n)),
+    'matrix': _matrix,
+    'matrix-rowmajor': lambda n: _matrix(n, row_major=True),
+    'matrix3d': lambda n: layouts.eigen_matrix(
+        layouts.double, 3, 3, layouts.sample(layouts.double, 9), fixed=True),
+    'matrix-block': _block,
+    'sparse': _sparse,
+    'tensor': _tensor,
+}
+
+def summarized(printer):
+    "Number of coefficients PRINTER summarizes in its to_string"
+    if not hasattr(printer, 'compact') or not printer.compact():
+        return 0
+    if hasattr(printer, 'memory_layout'):
+        count = 1
+        for extent in printer.memory_layout()[1]:
+            count *= extent
+        return count
+    if hasattr(printer, 'size'):
+        return int(printer.size)
+    return int(printer.rows) * int(printer.cols)
+
+def render(printer, limit):
+    "Format PRINTER the way `print' does, returning the element count"
+    text = printer.to_string()
+    str(text)
+    count = 0
+    if hasattr(printer, 'children'):
+        for name, child in printer.children():
+            str(child)
+            count += 1
+            if limit and count > limit:
+                break
+    # Large matrices have no children, their summary covers the elements
+    if count == 0:
+        count = summarized(printer)
+        if limit:
+            count = min(count, limit)
+    return count
+
+def measure(name, size, limit, repeat):
+    gdb.heap.clear()
+    value = cases[name](size)
+    best = None
+    for _ in range(repeat):
+        gdb.reset_stats()
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = render(gdb.default_visualizer(value), limit)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if best is None or elapsed < best[1]:
+            best = (count, elapsed, peak, dict(gdb.stats))
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the libc++ and Eigen pretty-printers.')
+    parser.add_argument('cases', nargs='*', metavar='case',
+                        help='cases to run: %s' % ', '.join(sorted(cases)))
+    parser.add_argument('-n', '--size', type=int, default=20000,
+                        help='elements per container (default %(default)s)')
+    parser.add_argument('--limit', type=int, default=0,
+                        help='print elements limit, 0 for unlimited')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='report the best of this many runs')
+    args = parser.parse_args()
+
+    gdb.set_parameter('print elements', args.limit or None)
+
+    for name in args.cases:
+        if name not in cases:
+            parser.error('unknown case %s' % name)
+
+    row = '%-16s %9s %9s %12s %9s %10s %10s'
+    print(row % ('case', 'elements', 'seconds', 'elements/s', 'reads',
+                 'fetches', 'peak KiB'))
+    for name in args.cases or sorted(cases):
+        count, elapsed, peak, stats = measure(name, args.size, args.limit,
+                                              args.repeat)
+        print(row % (name, count, '%.3f' % elapsed,
+                     '%.0f' % (count / elapsed if elapsed else 0),
+                     stats['reads'], stats['fetches'], '%.0f' % (peak / 1024.)))
+
+if __name__ == '__main__':
+    main()
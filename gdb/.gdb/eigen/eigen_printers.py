@@ -28,8 +28,264 @@
 #      end
 
 import gdb
-import re
 import itertools
+import array
+import struct
+import sys
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# Matrices with more coefficients than this are fetched with a single
+# memory read and printed as a truncated table with summary statistics
+# instead of one child per coefficient.  None disables this.
+compact_threshold = 256
+
+# Number of leading and trailing rows and columns shown in compact mode.
+compact_edge_items = 3
+
+# Number of SparseMatrix entries fetched per memory read.
+sparse_chunk_size = 4096
+
+def scalar_format(type):
+	"Return the struct format of the scalar TYPE, or None if it is not a plain number"
+
+	type = type.strip_typedefs()
+	if type.code == gdb.TYPE_CODE_FLT:
+		return {4: 'f', 8: 'd'}.get(type.sizeof)
+	if type.code != gdb.TYPE_CODE_INT:
+		return None
+
+	fmt = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}.get(type.sizeof)
+	if fmt is None:
+		return None
+	if hasattr(type, 'is_signed'):
+		signed = type.is_signed
+	else:
+		signed = int(gdb.Value(-1).cast(type)) < 0
+	return fmt if signed else fmt.upper()
+
+def target_byte_order():
+	"Return the struct byte order character of the inferior"
+
+	if 'big endian' in gdb.execute('show endian', to_string=True):
+		return '>'
+	return '<'
+
+# Decoded template parameters of the types seen so far, keyed by
+# objfile and type name.
+_parameter_cache = {}
+_layout_cache = {}
+
+def clear_layout_cache(event=None):
+	"Forget the decoded types, as objfiles may have come or gone"
+
+	_parameter_cache.clear()
+	_layout_cache.clear()
+
+def type_key(type):
+	"Return a hashable key for TYPE, qualified by the objfile defining it"
+
+	objfile = getattr(type, 'objfile', None)
+	return (objfile.filename if objfile is not None else None, type.tag)
+
+def template_parameters(type):
+	"Return the template parameters of TYPE as written in its tag, without spaces"
+
+	key = type_key(type)
+	params = _parameter_cache.get(key)
+	if params is not None:
+		return params
+
+	# The gdb extension does not support value template arguments - need to extract them by hand
+	tag = type.tag
+	params = []
+	depth = 0
+	param = ''
+	for c in tag[tag.index('<') + 1:tag.rindex('>')]:
+		if c == ',' and depth == 0:
+			params.append(param)
+			param = ''
+			continue
+		if c == '<':
+			depth += 1
+		elif c == '>':
+			depth -= 1
+		if c != ' ':
+			param += c
+	params.append(param)
+
+	_parameter_cache[key] = params
+	return params
+
+def plain_layout(type):
+	"Decode the Matrix or Array TYPE as (scalar type, rows, cols, options), with None for dynamic extents"
+
+	template_params = template_parameters(type)
+
+	def extent(param):
+		value = int(param, 0)
+		return None if value == -1 else value
+
+	options = 0 # default value
+	if len(template_params) > 3:
+		options = int(template_params[3], 0)
+
+	return (type.template_argument(0), extent(template_params[1]),
+	        extent(template_params[2]), options)
+
+def matrix_layout(type, val):
+	"Decode TYPE of VAL as (scalar type, rows, cols, options, fixed storage), with None for dynamic extents"
+
+	key = type_key(type)
+	layout = _layout_cache.get(key)
+	if layout is not None:
+		return layout
+
+	# Fixed size matrices have a struct as their storage
+	data = val['m_storage']['m_data'].type.strip_typedefs()
+	layout = plain_layout(type) + (data.code == gdb.TYPE_CODE_STRUCT,)
+	_layout_cache[key] = layout
+	return layout
+
+def dynamic_index(val):
+	"Return the value held by the Eigen::internal::variable_if_dynamic VAL"
+
+	value = int(template_parameters(val.type.unqualified().strip_typedefs())[-1], 0)
+	if value == -1:
+		return int(val['m_value'])
+	return value
+
+def dense_view(val):
+	"""Describe the dense expression VAL as (scalar type, rows, cols, data pointer, row stride, col stride),
+	coefficient (i, j) being i * row stride + j * col stride elements past the data pointer.
+	Return None for expressions that are not backed by memory."""
+
+	if val.type.strip_typedefs().code == gdb.TYPE_CODE_REF:
+		val = val.referenced_value()
+	type = val.type.unqualified().strip_typedefs()
+	if type.tag == None or not type.tag.endswith('>'):
+		return None
+	name = type.tag[:type.tag.find('<')]
+
+	if name in ('Eigen::Matrix', 'Eigen::Array'):
+		innerType, rows, cols, options, fixed = matrix_layout(type, val)
+		if rows is None:
+			rows = int(val['m_storage']['m_rows'])
+		if cols is None:
+			cols = int(val['m_storage']['m_cols'])
+		data = val['m_storage']['m_data']
+		if fixed:
+			data = data['array'].cast(innerType.pointer())
+		if options & 0x1:
+			return (innerType, rows, cols, data, cols, 1)
+		return (innerType, rows, cols, data, 1, rows)
+
+	if name in ('Eigen::Map', 'Eigen::Ref'):
+		plain = type.template_argument(0).unqualified().strip_typedefs()
+		if plain.tag == None or plain.tag[:plain.tag.find('<')] not in ('Eigen::Matrix', 'Eigen::Array'):
+			return None
+		innerType, _, _, options = plain_layout(plain)
+		rows = dynamic_index(val['m_rows'])
+		cols = dynamic_index(val['m_cols'])
+
+		# A compile time stride of 0 stands for the default one
+		inner = dynamic_index(val['m_stride']['m_inner']) or 1
+		outer = dynamic_index(val['m_stride']['m_outer'])
+		if outer == 0:
+			outer = (cols if options & 0x1 else rows) * inner
+		if options & 0x1:
+			return (innerType, rows, cols, val['m_data'], outer, inner)
+		return (innerType, rows, cols, val['m_data'], inner, outer)
+
+	if name == 'Eigen::Block':
+		# Blocks of expressions without direct access have no data pointer
+		try:
+			data = val['m_data']
+		except gdb.error:
+			return None
+		view = dense_view(val['m_xpr'])
+		if view is None:
+			return None
+		return (view[0], dynamic_index(val['m_rows']), dynamic_index(val['m_cols']), data, view[4], view[5])
+
+	return None
+
+def read_scalars(pointer, count):
+	"Read COUNT plain numbers starting at POINTER with a single memory read"
+
+	fmt = target_byte_order() + '%d' % count + scalar_format(pointer.type.strip_typedefs().target())
+	return struct.unpack(fmt, gdb.selected_inferior().read_memory(int(pointer), struct.calcsize(fmt)))
+
+def memory_lines(rows, cols, rowStride, colStride):
+	"""Split a ROWS x COLS view into lines of adjacent coefficients, returning
+	(whether lines are rows, line count, line length, line pitch, coefficient step)"""
+
+	if cols != 1 and (rows == 1 or colStride < rowStride):
+		return (True, rows, cols, rowStride, colStride)
+	return (False, cols, rows, colStride, rowStride)
+
+def strided_coefficients(type, rows, cols, data, rowStride, colStride):
+	"""Read the coefficients of a ROWS x COLS view of TYPE at DATA, returning a row major accessor
+	and the coefficients in memory order.  Lines lying far apart, as in a block of a larger
+	matrix, are read one at a time so that only the memory they span is fetched."""
+
+	fmt = target_byte_order() + scalar_format(type)
+	size = struct.calcsize(fmt)
+	alongRows, lines, length, pitch, step = memory_lines(rows, cols, rowStride, colStride)
+	span = (length - 1) * step + 1
+
+	inferior = gdb.selected_inferior()
+	address = int(data)
+	if lines > 1 and pitch > 2 * span:
+		buf = b''.join(bytes(inferior.read_memory(address + line * pitch * size, span * size))
+		               for line in range(lines))
+		pitch = span
+	else:
+		buf = inferior.read_memory(address, ((lines - 1) * pitch + span) * size)
+
+	if numpy is not None:
+		values = numpy.frombuffer(buf, dtype=numpy.dtype(fmt))
+		values = numpy.lib.stride_tricks.as_strided(values, shape=(lines, length),
+		                                            strides=(pitch * size, step * size), writeable=False)
+		return (values if alongRows else values.T), values.ravel()
+
+	values = array.array(fmt[1])
+	values.frombytes(bytes(buf))
+	if fmt[0] != ('<' if sys.byteorder == 'little' else '>'):
+		values.byteswap()
+	if pitch != length or step != 1:
+		values = array.array(fmt[1], [values[line * pitch + i * step] for line in range(lines) for i in range(length)])
+
+	if alongRows:
+		return (lambda row, col: values[row * length + col]), values
+	return (lambda row, col: values[col * length + row]), values
+
+def summarize(matrix, values, rows, cols):
+	"Render the coefficients as a truncated table preceded by summary statistics"
+
+	if numpy is not None:
+		stats = (values.min(), values.max(), values.mean())
+		table = numpy.array2string(matrix, threshold=0, edgeitems=compact_edge_items)
+	else:
+		stats = (min(values), max(values), sum(values) / float(len(values)))
+		cells = []
+		for row in summary_indices(rows, compact_edge_items):
+			cells.append(['...' if row is None or col is None else '%g' % matrix(row, col)
+			              for col in summary_indices(cols, compact_edge_items)])
+		width = max(len(cell) for line in cells for cell in line)
+		table = '\n'.join('[' + ' '.join(cell.rjust(width) for cell in line) + ']' for line in cells)
+
+	return 'min = %g, max = %g, mean = %g\n%s' % (stats + (table,))
+
+def summary_indices(count, edge):
+	"Indices to show out of COUNT, with None standing for the elided middle"
+
+	if count <= 2 * edge:
+		return list(range(count))
+	return list(range(edge)) + [None] + list(range(count - edge, count))
 
 
 class EigenMatrixPrinter:
@@ -41,40 +297,28 @@ class EigenMatrixPrinter:
 		# Save the variety (presumably "Matrix" or "Array") for later usage
 		self.variety = variety
 
-		# The gdb extension does not support value template arguments - need to extract them by hand
 		type = val.type
 		if type.code == gdb.TYPE_CODE_REF:
 			type = type.target()
 		self.type = type.unqualified().strip_typedefs()
-		tag = self.type.tag
-		regex = re.compile('\<.*\>')
-		m = regex.findall(tag)[0][1:-1]
-		template_params = m.split(',')
-		template_params = [x.replace(" ", "") for x in template_params]
+		self.innerType, rows, cols, self.options, fixed = matrix_layout(self.type, val)
+		self.rowMajor = self.options & 0x1
 
-		if template_params[1] == '-0x00000000000000001' or template_params[1] == '-0x000000001' or template_params[1] == '-1':
+		self.val = val
+
+		if rows is None:
 			self.rows = val['m_storage']['m_rows']
 		else:
-			self.rows = int(template_params[1])
+			self.rows = rows
 
-		if template_params[2] == '-0x00000000000000001' or template_params[2] == '-0x000000001' or template_params[2] == '-1':
+		if cols is None:
 			self.cols = val['m_storage']['m_cols']
 		else:
-			self.cols = int(template_params[2])
-
-		self.options = 0 # default value
-		if len(template_params) > 3:
-			self.options = template_params[3];
-
-		self.rowMajor = (int(self.options) & 0x1)
-
-		self.innerType = self.type.template_argument(0)
-
-		self.val = val
+			self.cols = cols
 
 		# Fixed size matrices have a struct as their storage, so we need to walk through this
 		self.data = self.val['m_storage']['m_data']
-		if self.data.type.code == gdb.TYPE_CODE_STRUCT:
+		if fixed:
 			self.data = self.data['array']
 			self.data = self.data.cast(self.innerType.pointer())
 
@@ -123,12 +367,332 @@ class EigenMatrixPrinter:
 				return ('[%d]' % (col,), item)
 			return ('[%d,%d]' % (row, col), item)
 
+	def compact(self):
+		"Whether to print a summary instead of one child per coefficient"
+
+		if compact_threshold is None:
+			return False
+		if int(self.rows) * int(self.cols) <= compact_threshold:
+			return False
+		return scalar_format(self.innerType) is not None
+
+	def summary(self):
+		"Render the coefficients, read at once, as a truncated table preceded by summary statistics"
+
+		rows = int(self.rows)
+		cols = int(self.cols)
+		if self.rowMajor:
+			matrix, values = strided_coefficients(self.innerType, rows, cols, self.data, cols, 1)
+		else:
+			matrix, values = strided_coefficients(self.innerType, rows, cols, self.data, 1, rows)
+		return summarize(matrix, values, rows, cols)
+
 	def children(self):
 
+		if self.compact():
+			return []
 		return self._iterator(self.rows, self.cols, self.data, self.rowMajor)
 
+	def memory_layout(self):
+		"Describe the coefficients as (scalar type, shape, Fortran order, [(address, size)])"
+
+		rows = int(self.rows)
+		cols = int(self.cols)
+		size = rows * cols * self.innerType.strip_typedefs().sizeof
+		return (self.innerType, (rows, cols), not self.rowMajor, [(int(self.data), size)])
+
+	def to_string(self):
+		header = "Eigen::%s<%s,%d,%d,%s> (data ptr: %s)" % (self.variety, self.innerType, self.rows, self.cols, "RowMajor" if self.rowMajor else  "ColMajor", self.data)
+		if self.compact():
+			return header + '\n' + self.summary()
+		return header
+
+class EigenViewPrinter:
+	"Print an Eigen Map, Ref or Block through the strides of the memory it refers to"
+
+	def __init__(self, variety, val, view):
+		"Extract all the necessary information"
+
+		self.variety = variety
+		self.val = val
+		self.innerType, self.rows, self.cols, self.data, self.rowStride, self.colStride = view
+
+	class _iterator:
+		def __init__ (self, printer):
+			self.printer = printer
+			self.alongRows, _, self.length, self.pitch, self.step = memory_lines(printer.rows, printer.cols, printer.rowStride, printer.colStride)
+			self.count = printer.rows * printer.cols
+			self.index = 0
+
+			# Plain numbers are fetched a line at a time, anything else one coefficient at a time
+			self.values = None
+			if self.count > 0 and scalar_format(printer.innerType) is not None:
+				_, values = strided_coefficients(printer.innerType, printer.rows, printer.cols, printer.data, printer.rowStride, printer.colStride)
+				self.values = iter(values.tolist())
+
+		def __iter__ (self):
+			return self
+
+		def next(self):
+			return self.__next__()  # Python 2.x compatibility
+
+		def __next__(self):
+			if self.index >= self.count:
+				raise StopIteration
+
+			line, i = divmod(self.index, self.length)
+			self.index = self.index + 1
+			if self.alongRows:
+				row, col = line, i
+			else:
+				row, col = i, line
+
+			if self.values is not None:
+				item = gdb.Value(next(self.values)).cast(self.printer.innerType)
+			else:
+				item = (self.printer.data + (line * self.pitch + i * self.step)).dereference()
+			if (self.printer.cols == 1): #if it's a column vector
+				return ('[%d]' % (row,), item)
+			elif (self.printer.rows == 1): #if it's a row vector
+				return ('[%d]' % (col,), item)
+			return ('[%d,%d]' % (row, col), item)
+
+	def compact(self):
+		"Whether to print a summary instead of one child per coefficient"
+
+		if compact_threshold is None:
+			return False
+		if self.rows * self.cols <= compact_threshold:
+			return False
+		return scalar_format(self.innerType) is not None
+
+	def children(self):
+
+		if self.compact():
+			return []
+		return self._iterator(self)
+
+	def to_string(self):
+		header = "Eigen::%s<%s,%d,%d> (data ptr: %s, strides: %d,%d)" % (self.variety, self.innerType, self.rows, self.cols, self.data, self.rowStride, self.colStride)
+		if self.compact():
+			matrix, values = strided_coefficients(self.innerType, self.rows, self.cols, self.data, self.rowStride, self.colStride)
+			return header + '\n' + summarize(matrix, values, self.rows, self.cols)
+		return header
+
+def view_printer(variety, val):
+	"Return a printer for the Map, Ref or Block VAL, or None when it does not refer to memory"
+
+	view = dense_view(val)
+	if view is None:
+		return None
+	return EigenViewPrinter(variety, val, view)
+
+class EigenSparseMatrixPrinter:
+	"Print the nonzero coefficients of an Eigen SparseMatrix"
+
+	def __init__(self, val):
+		"Extract all the necessary information"
+
+		type = val.type
+		if type.code == gdb.TYPE_CODE_REF:
+			type = type.target()
+		self.type = type.unqualified().strip_typedefs()
+		template_params = template_parameters(self.type)
+		self.innerType = self.type.template_argument(0)
+		self.rowMajor = len(template_params) > 1 and int(template_params[1], 0) & 0x1
+
+		self.val = val
+		self.outerSize = int(val['m_outerSize'])
+		self.innerSize = int(val['m_innerSize'])
+		if self.rowMajor:
+			self.rows, self.cols = self.outerSize, self.innerSize
+		else:
+			self.rows, self.cols = self.innerSize, self.outerSize
+
+		self.outerIndex = val['m_outerIndex']
+		self.innerNonZeros = val['m_innerNonZeros']
+		self.values = val['m_data']['m_values']
+		self.indices = val['m_data']['m_indices']
+
+	class _iterator:
+		def __init__ (self, printer):
+			self.printer = printer
+			self.numeric = scalar_format(printer.innerType) is not None
+
+			# The extent of every outer line is read upfront, the entries in chunks
+			self.starts = []
+			self.ends = []
+			if printer.outerSize > 0 and int(printer.outerIndex) != 0:
+				outerIndex = read_scalars(printer.outerIndex, printer.outerSize + 1)
+				self.starts = outerIndex[:-1]
+				if int(printer.innerNonZeros) != 0:
+					nonZeros = read_scalars(printer.innerNonZeros, printer.outerSize)
+					self.ends = [start + count for start, count in zip(self.starts, nonZeros)]
+				else:
+					self.ends = outerIndex[1:]
+				self.storageEnd = outerIndex[-1]
+
+			self.outer = 0
+			self.position = self.starts[0] if self.starts else 0
+			self.chunkStart = 0
+			self.chunkIndices = ()
+			self.chunkValues = ()
+
+		def __iter__ (self):
+			return self
+
+		def next(self):
+			return self.__next__()  # Python 2.x compatibility
+
+		def read_chunk(self):
+			count = min(sparse_chunk_size, self.storageEnd - self.position)
+			self.chunkStart = self.position
+			self.chunkIndices = read_scalars(self.printer.indices + self.position, count)
+			if self.numeric:
+				self.chunkValues = read_scalars(self.printer.values + self.position, count)
+
+		def __next__(self):
+			while self.outer < len(self.starts) and self.position >= self.ends[self.outer]:
+				self.outer = self.outer + 1
+				if self.outer < len(self.starts):
+					self.position = self.starts[self.outer]
+			if self.outer >= len(self.starts):
+				raise StopIteration
+
+			offset = self.position - self.chunkStart
+			if offset < 0 or offset >= len(self.chunkIndices):
+				self.read_chunk()
+				offset = 0
+
+			inner = self.chunkIndices[offset]
+			if self.numeric:
+				item = gdb.Value(self.chunkValues[offset]).cast(self.printer.innerType)
+			else:
+				item = (self.printer.values + self.position).dereference()
+			self.position = self.position + 1
+
+			if self.printer.rowMajor:
+				return ('[%d,%d]' % (self.outer, inner), item)
+			return ('[%d,%d]' % (inner, self.outer), item)
+
+	def nonzeros(self):
+		"Count the stored coefficients"
+
+		if self.outerSize == 0 or int(self.outerIndex) == 0:
+			return 0
+		if int(self.innerNonZeros) != 0:
+			return sum(read_scalars(self.innerNonZeros, self.outerSize))
+		outerIndex = read_scalars(self.outerIndex, self.outerSize + 1)
+		return outerIndex[-1] - outerIndex[0]
+
+	def children(self):
+
+		return self._iterator(self)
+
+	def to_string(self):
+		return "Eigen::SparseMatrix<%s,%s> %dx%d, %d nonzeros%s (data ptr: %s)" % (self.innerType, "RowMajor" if self.rowMajor else "ColMajor", self.rows, self.cols, self.nonzeros(), "" if int(self.innerNonZeros) == 0 else ", uncompressed", self.values)
+
+class EigenTensorPrinter:
+	"Print an Eigen Tensor"
+
+	def __init__(self, val):
+		"Extract all the necessary information"
+
+		type = val.type
+		if type.code == gdb.TYPE_CODE_REF:
+			type = type.target()
+		self.type = type.unqualified().strip_typedefs()
+		template_params = template_parameters(self.type)
+		self.innerType = self.type.template_argument(0)
+		self.rowMajor = len(template_params) > 2 and int(template_params[2], 0) & 0x1
+
+		self.val = val
+		self.data = val['m_storage']['m_data']
+
+		# The dimensions are an Eigen::array, which is std::array in C++11 builds
+		dimensions = val['m_storage']['m_dimensions']
+		for name in ('values', '__elems_', '_M_elems'):
+			try:
+				dimensions = dimensions[name]
+				break
+			except gdb.error:
+				pass
+		self.dimensions = [int(dimensions[i]) for i in range(int(template_params[1], 0))]
+
+		self.size = 1
+		for extent in self.dimensions:
+			self.size = self.size * extent
+
+	class _iterator:
+		def __init__ (self, printer, values):
+			self.printer = printer
+			self.values = values
+			self.index = 0
+
+			# Strides of the indices in memory order
+			self.strides = []
+			stride = 1
+			order = range(len(printer.dimensions))
+			if printer.rowMajor:
+				order = reversed(order)
+			for dimension in order:
+				self.strides.append((dimension, stride))
+				stride = stride * printer.dimensions[dimension]
+
+		def __iter__ (self):
+			return self
+
+		def next(self):
+			return self.__next__()  # Python 2.x compatibility
+
+		def __next__(self):
+			if self.index >= self.printer.size:
+				raise StopIteration
+
+			indices = [0] * len(self.printer.dimensions)
+			for dimension, stride in self.strides:
+				indices[dimension] = self.index // stride % self.printer.dimensions[dimension]
+
+			if self.values is not None:
+				item = gdb.Value(self.values[self.index]).cast(self.printer.innerType)
+			else:
+				item = (self.printer.data + self.index).dereference()
+			self.index = self.index + 1
+			return ('[%s]' % ','.join('%d' % index for index in indices), item)
+
+	def compact(self):
+		"Whether to print a summary instead of one child per coefficient"
+
+		if compact_threshold is None:
+			return False
+		if self.size <= compact_threshold:
+			return False
+		return scalar_format(self.innerType) is not None
+
+	def coefficients(self):
+		"Read all the coefficients at once, in memory order"
+
+		_, values = strided_coefficients(self.innerType, 1, self.size, self.data, self.size, 1)
+		return values
+
+	def children(self):
+
+		if self.compact():
+			return []
+		if self.size > 0 and scalar_format(self.innerType) is not None:
+			return self._iterator(self, self.coefficients().tolist())
+		return self._iterator(self, None)
+
 	def to_string(self):
-		return "Eigen::%s<%s,%d,%d,%s> (data ptr: %s)" % (self.variety, self.innerType, self.rows, self.cols, "RowMajor" if self.rowMajor else  "ColMajor", self.data)
+		header = "Eigen::Tensor<%s,%d,%s> [%s] (data ptr: %s)" % (self.innerType, len(self.dimensions), "RowMajor" if self.rowMajor else "ColMajor", 'x'.join('%d' % extent for extent in self.dimensions), self.data)
+		if not self.compact():
+			return header
+
+		values = self.coefficients()
+		if numpy is not None:
+			table = numpy.array2string(values.reshape(self.dimensions, order='C' if self.rowMajor else 'F'), threshold=0, edgeitems=compact_edge_items)
+			return header + '\nmin = %g, max = %g, mean = %g\n%s' % (values.min(), values.max(), values.mean(), table)
+		return header + '\nmin = %g, max = %g, mean = %g' % (min(values), max(values), sum(values) / float(len(values)))
 
 class EigenQuaternionPrinter:
 	"Print an Eigen Quaternion"
@@ -179,9 +743,14 @@ class EigenQuaternionPrinter:
 		return "Eigen::Quaternion<%s> (data ptr: %s)" % (self.innerType, self.data)
 
 def build_eigen_dictionary ():
-	pretty_printers_dict[re.compile('^Eigen::Quaternion<.*>$')] = lambda val: EigenQuaternionPrinter(val)
-	pretty_printers_dict[re.compile('^Eigen::Matrix<.*>$')] = lambda val: EigenMatrixPrinter("Matrix", val)
-	pretty_printers_dict[re.compile('^Eigen::Array<.*>$')]  = lambda val: EigenMatrixPrinter("Array",  val)
+	pretty_printers_dict['Eigen::Quaternion'] = lambda val: EigenQuaternionPrinter(val)
+	pretty_printers_dict['Eigen::Matrix'] = lambda val: EigenMatrixPrinter("Matrix", val)
+	pretty_printers_dict['Eigen::Array']  = lambda val: EigenMatrixPrinter("Array",  val)
+	pretty_printers_dict['Eigen::Map']    = lambda val: view_printer("Map",   val)
+	pretty_printers_dict['Eigen::Ref']    = lambda val: view_printer("Ref",   val)
+	pretty_printers_dict['Eigen::Block']  = lambda val: view_printer("Block", val)
+	pretty_printers_dict['Eigen::SparseMatrix'] = lambda val: EigenSparseMatrixPrinter(val)
+	pretty_printers_dict['Eigen::Tensor'] = lambda val: EigenTensorPrinter(val)
 
 def register_eigen_printers(obj):
 	"Register eigen pretty-printers with objfile Obj"
@@ -190,6 +759,11 @@ def register_eigen_printers(obj):
 		obj = gdb
 	obj.pretty_printers.append(lookup_function)
 
+	if hasattr(gdb, 'events'):
+		gdb.events.new_objfile.connect(clear_layout_cache)
+		if hasattr(gdb.events, 'clear_objfiles'):
+			gdb.events.clear_objfiles.connect(clear_layout_cache)
+
 def lookup_function(val):
 	"Look-up and return a pretty-printer that can print va."
 
@@ -204,12 +778,16 @@ def lookup_function(val):
 	if typename == None:
 		return None
 
-	for function in pretty_printers_dict:
-		if function.search(typename):
-			return pretty_printers_dict[function](val)
-
-	return None
+	# Dispatch on the template name, Eigen::Matrix<double, 3, 3, 0, 3, 3>
+	# is printed by the entry for Eigen::Matrix
+	if not typename.endswith('>'):
+		return None
+	function = pretty_printers_dict.get(typename[:typename.find('<')])
+	if function is None:
+		return None
+	return function(val)
 
+# Printer factories keyed by the name of the class template they print
 pretty_printers_dict = {}
 
 build_eigen_dictionary ()
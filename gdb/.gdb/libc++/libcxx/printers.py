@@ -18,6 +18,7 @@
 import gdb
 import itertools
 import re
+import struct
 
 # Try to use the new-style pretty-printing if available.
 _use_gdb_pp = True
@@ -35,17 +36,59 @@ try:
 except ImportError:
     pass
 
+# Fetch arrays of scalars and tree links with raw read_memory calls
+# instead of one dereference() per element or link.
+_use_bulk_read = True
+
+# Number of elements fetched per read_memory call once the first
+# chunk, sized after `print elements', has been consumed.
+_bulk_chunk_size = 65536
+
+# Results of find_type, keyed by type_cache_key plus the member name.
+_find_type_cache = {}
+
+# Return a hashable key for TYP, qualified by the objfile that defines
+# it.  Structs already carry their fully qualified name, so the more
+# expensive type printing is only needed for the other kinds of type.
+# Like get_basic_type, references, qualifiers and typedefs are stripped
+# first: two function-local aliases may share a name and objfile while
+# naming different types, and so may `const V &' for each of them.
+def type_cache_key(typ):
+    if typ.code == gdb.TYPE_CODE_REF:
+        typ = typ.target()
+    typ = typ.unqualified().strip_typedefs()
+    objfile = getattr(typ, 'objfile', None)
+    if objfile is not None:
+        objfile = objfile.filename
+    if typ.code == gdb.TYPE_CODE_STRUCT and typ.name:
+        return (objfile, typ.name)
+    return (objfile, str(typ))
+
+# Forget every resolved type, as types may go away or change meaning
+# when objfiles are loaded or discarded.
+def clear_type_caches(event=None):
+    _find_type_cache.clear()
+    if libcxx_printer is not None:
+        libcxx_printer.cache.clear()
+
 # Starting with the type ORIG, search for the member type NAME.  This
 # handles searching upward through superclasses.  This is needed to
 # work around http://sourceware.org/bugzilla/show_bug.cgi?id=13615.
 def find_type(orig, name):
+    key = type_cache_key(orig) + (name,)
+    if key in _find_type_cache:
+        return _find_type_cache[key]
+
     typ = orig.strip_typedefs()
     while True:
         search = str(typ) + '::' + name
         try:
-            return gdb.lookup_type(search)
+            result = gdb.lookup_type(search)
         except RuntimeError:
             pass
+        else:
+            _find_type_cache[key] = result
+            return result
         # The type was not found, so try the superclass.  We only need
         # to check the first superclass, so we don't bother with
         # anything fancier here.
@@ -54,6 +97,158 @@ def find_type(orig, name):
             raise ValueError("Cannot find type %s::%s" % (str(orig), name))
         typ = field.type
 
+# Return the byte offset of the member NAME within TYP, looking
+# through base classes as well.
+def field_offset(typ, name):
+    typ = typ.strip_typedefs()
+    for field in typ.fields():
+        if field.name == name:
+            return field.bitpos // 8
+    for field in typ.fields():
+        if field.is_base_class:
+            offset = field_offset(field.type, name)
+            if offset is not None:
+                return field.bitpos // 8 + offset
+    return None
+
+# Return the struct byte-order character matching the inferior.
+def target_byte_order():
+    try:
+        endian = gdb.execute('show endian', to_string=True)
+    except gdb.error:
+        return '='
+    if 'big endian' in endian:
+        return '>'
+    return '<'
+
+# Return the `print elements' limit, or None when it is unlimited.
+def print_elements_limit():
+    try:
+        limit = gdb.parameter('print elements')
+    except RuntimeError:
+        return None
+    return limit or None
+
+def is_signed_type(typ):
+    if hasattr(typ, 'is_signed'):
+        return typ.is_signed
+    return int(gdb.Value(-1).cast(typ)) < 0
+
+# Describe how to decode values of the scalar type TYP from raw
+# inferior memory.  Returns a (struct format, cast type) pair, where
+# the format takes the element count through `%', and cast type is
+# None when the decoded Python value prints exactly like the original
+# gdb.Value would.  Returns None if TYP is not a plain scalar.
+def scalar_decoder(typ):
+    typ = typ.strip_typedefs()
+    size = typ.sizeof
+    if typ.code == gdb.TYPE_CODE_FLT:
+        fmt = {4: 'f', 8: 'd'}.get(size)
+    elif typ.code == gdb.TYPE_CODE_BOOL:
+        fmt = {1: '?'}.get(size)
+    elif typ.code in (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_CHAR,
+                      gdb.TYPE_CODE_ENUM):
+        fmt = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}.get(size)
+        if fmt and not is_signed_type(typ):
+            fmt = fmt.upper()
+    else:
+        return None
+    if fmt is None:
+        return None
+    fmt = target_byte_order() + '%d' + fmt
+
+    # Characters, enums and single precision floats are cast back to
+    # their own type so that gdb keeps formatting them as usual.
+    if (typ.code == gdb.TYPE_CODE_INT and size > 1) or \
+       (typ.code == gdb.TYPE_CODE_FLT and size == 8) or \
+       typ.code == gdb.TYPE_CODE_BOOL:
+        return (fmt, None)
+    return (fmt, typ)
+
+class ScalarArrayIterator:
+    "Iterate over COUNT scalars at START using bulk memory reads"
+
+    def __init__(self, start, count, decoder, index=0):
+        self.start = start
+        self.address = int(start)
+        self.count = count
+        self.first = index
+        self.index = index
+        self.fmt = decoder[0]
+        self.cast = decoder[1]
+        self.size = start.type.strip_typedefs().target().sizeof
+        self.values = iter(())
+        self.fallback = False
+
+        # The first chunk only covers what gdb is going to show, plus
+        # one element so that it knows whether to print "...".
+        limit = print_elements_limit()
+        self.chunk = _bulk_chunk_size
+        if limit is not None:
+            self.chunk = limit + 1
+
+    def __iter__(self):
+        return self
+
+    def read_chunk(self):
+        count = min(self.chunk, self.count)
+        try:
+            buf = gdb.selected_inferior().read_memory(self.address,
+                                                      count * self.size)
+        except gdb.MemoryError:
+            # Let the per-element path report the unreadable element.
+            self.fallback = True
+            return
+        self.values = iter(struct.unpack(self.fmt % count, buf))
+        self.address += count * self.size
+        self.count -= count
+        self.chunk = _bulk_chunk_size
+
+    def __next__(self):
+        index = self.index
+        if self.fallback:
+            if self.count == 0:
+                raise StopIteration
+            self.count -= 1
+            self.index += 1
+            elt = (self.start + (index - self.first)).dereference()
+            return ('[%d]' % index, elt)
+
+        try:
+            value = next(self.values)
+        except StopIteration:
+            if self.count == 0:
+                raise
+            self.read_chunk()
+            return self.__next__()
+
+        self.index += 1
+        if self.cast is not None:
+            value = gdb.Value(value).cast(self.cast)
+        return ('[%d]' % index, value)
+
+class ContainerPrinter:
+    "Base for printers whose children can be restricted to a window"
+
+    offset = 0
+    limit = None
+
+    # Make children() yield at most COUNT elements starting at index
+    # START.  Elements before START are skipped without building
+    # children for them.
+    def window(self, start, count):
+        self.offset = start
+        self.limit = count
+        return self
+
+    # Return the [begin, end) range of element indices to show for a
+    # container holding SIZE elements.
+    def window_range(self, size):
+        begin = min(self.offset, size)
+        if self.limit is None:
+            return (begin, size)
+        return (begin, min(size, begin + self.limit))
+
 class StdStringPrinter:
     "Print a std::basic_string of some kind"
 
@@ -165,21 +360,22 @@ class StdTuplePrinter:
 #    def display_hint(self):
 #        return 'array'
 
-class StdListPrinter:
+class StdListPrinter(ContainerPrinter):
     "Print a std::list"
 
     class _iterator:
-        def __init__(self, nodetype, head):
+        def __init__(self, nodetype, head, base, count, end):
             self.nodetype = nodetype
-            self.base = head['__next_']
+            self.base = base
             self.head = head.address
-            self.count = 0
+            self.count = count
+            self.end = end
 
         def __iter__(self):
             return self
 
         def __next__(self):
-            if self.base == self.head:
+            if self.base == self.head or self.count == self.end:
                 raise StopIteration
             elt = self.base.cast(self.nodetype).dereference()
             self.base = elt['__next_']
@@ -194,7 +390,21 @@ class StdListPrinter:
     def children(self):
         nodetype = find_type(self.val.type, '__node')
         nodetype = nodetype.strip_typedefs().pointer()
-        return self._iterator(nodetype, self.val['__end_'])
+        head = self.val['__end_']
+        size = int(self.val['__size_alloc_']['__first_'])
+        begin, end = self.window_range(size)
+
+        # Walk to the first node of the window from whichever end of
+        # the list is closer, following the links only.
+        if begin <= size // 2:
+            base = head['__next_']
+            for i in range(begin):
+                base = base.dereference()['__next_']
+        else:
+            base = head['__prev_']
+            for i in range(size - 1 - begin):
+                base = base.dereference()['__prev_']
+        return self._iterator(nodetype, head, base, begin, end)
 
     def to_string(self):
         if self.val['__end_']['__next_'] == self.val['__end_'].address:
@@ -214,19 +424,20 @@ class StdListIteratorPrinter:
     def to_string(self):
         return self.val['__ptr_']['__value_']
 
-class StdForwardListPrinter:
+class StdForwardListPrinter(ContainerPrinter):
     "Print a std::forward_list"
 
     class _iterator:
-        def __init__(self, head):
+        def __init__(self, head, count, end):
             self.node = head
-            self.count = 0
+            self.count = count
+            self.end = end
 
         def __iter__(self):
             return self
 
         def __next__(self):
-            if self.node == 0:
+            if self.node == 0 or self.count == self.end:
                 raise StopIteration
 
             result = ('[%d]' % self.count, self.node['__value_'])
@@ -240,28 +451,38 @@ class StdForwardListPrinter:
         self.head = val['__before_begin_']['__first_']['__next_']
 
     def children(self):
-        return self._iterator(self.head)
+        # The size is not stored, so skip nodes up to the window.
+        node = self.head
+        count = 0
+        while count < self.offset and node != 0:
+            node = node['__next_']
+            count += 1
+        end = None
+        if self.limit is not None:
+            end = count + self.limit
+        return self._iterator(node, count, end)
 
     def to_string(self):
         if self.head == 0:
             return 'empty %s' % (self.typename)
         return '%s' % (self.typename)
 
-class StdVectorPrinter:
+class StdVectorPrinter(ContainerPrinter):
     "Print a std::vector"
 
     class _iterator:
-        def __init__ (self, start, finish_or_size, bits_per_word, bitvec):
+        def __init__ (self, start, finish_or_size, bits_per_word, bitvec,
+                      count=0):
             self.bitvec = bitvec
             if bitvec:
-                self.item   = start
-                self.so     = 0
+                self.item   = start + count // bits_per_word
+                self.so     = count % bits_per_word
                 self.size   = finish_or_size
                 self.bits_per_word = bits_per_word
             else:
                 self.item = start
                 self.finish = finish_or_size
-            self.count = 0
+            self.count = count
 
         def __iter__(self):
             return self
@@ -298,16 +519,33 @@ class StdVectorPrinter:
                 self.is_bool = 1
 
     def children(self):
+        start = self.val['__begin_']
         if self.is_bool:
-            return self._iterator(self.val['__begin_'],
-                              self.val['__size_'],
-                              self.val['__bits_per_word'],
-                              self.is_bool)
-        else:
-            return self._iterator(self.val['__begin_'],
-                              self.val['__end_'],
-                              0,
-                              self.is_bool)
+            begin, end = self.window_range(int(self.val['__size_']))
+            return self._iterator(start, end,
+                              int(self.val['__bits_per_word']),
+                              self.is_bool, begin)
+        begin, end = self.window_range(int(self.val['__end_'] - start))
+        if _use_bulk_read:
+            decoder = scalar_decoder(start.type.strip_typedefs().target())
+            if decoder is not None:
+                return ScalarArrayIterator(start + begin, end - begin,
+                                           decoder, begin)
+        return self._iterator(start + begin, start + end, 0, self.is_bool,
+                              begin)
+
+    # Describe the raw storage of the elements as (element type, shape,
+    # Fortran order, spans), where spans yields the (address, size)
+    # ranges of memory holding the elements in order.  Returns None
+    # when the elements are not stored as plain bytes.
+    def memory_layout(self):
+        if self.is_bool:
+            return None
+        start = self.val['__begin_']
+        elttype = start.type.strip_typedefs().target()
+        length = int(self.val['__end_'] - start)
+        size = elttype.strip_typedefs().sizeof
+        return (elttype, (length,), False, [(int(start), length * size)])
 
     def to_string(self):
         start = self.val['__begin_']
@@ -353,40 +591,36 @@ class StdVectorBoolIteratorPrinter:
         else:
             return 0
 
-class StdDequePrinter:
+class StdDequePrinter(ContainerPrinter):
     "Print a std::deque"
 
     class _iterator:
-        def __init__(self, size, block_size, start, map_begin, map_end):
+        def __init__(self, block_size, start, map_begin, count, end):
             self.block_size = block_size
-            self.count = 0
-            self.end_p = size + start
-            self.end_mp = map_begin + self.end_p / block_size
-            self.p = 0
-            self.mp = map_begin + start / block_size
-            if map_begin == map_end:
-                self.p = 0
-                self.end_p = 0
-            else:
-                self.p = self.mp.dereference() + start % block_size
-                self.end_p = self.end_mp.dereference() + self.end_p % block_size
+            self.start = start
+            self.map_begin = map_begin
+            self.count = count
+            self.end = end
+            self.p = None
 
         def __iter__(self):
             return self
 
         def __next__(self):
-            old_p = self.p
-
-            self.count += 1
-            self.p += 1;
-            if (self.p - self.mp.dereference()) == self.block_size:
-                self.mp += 1
-                self.p = self.mp.dereference()
-
-            if (self.mp > self.end_mp) or ((self.p > self.end_p) and (self.mp == self.end_mp)):
+            if self.count >= self.end:
                 raise StopIteration
 
-            return ('[%d]' % int(self.count - 1), old_p.dereference())
+            # Look the block up in the map when entering it, otherwise
+            # just step through the current one.
+            pos = self.start + self.count
+            if self.p is None or pos % self.block_size == 0:
+                block = (self.map_begin + pos // self.block_size).dereference()
+                self.p = block + pos % self.block_size
+
+            elt = self.p.dereference()
+            self.p += 1
+            self.count += 1
+            return ('[%d]' % (self.count - 1), elt)
 
     def __init__(self, typename, val):
         self.typename = typename
@@ -399,11 +633,49 @@ class StdDequePrinter:
         else:
             return '%s (size=%d)' % (self.typename, int(self.size))
 
+    # Yield (index, pointer, count) for each run of elements within
+    # [BEGIN, END) that is contiguous in one block.
+    def blocks(self, begin, end):
+        block_size = int(self.val['__block_size'])
+        start = int(self.val['__start_'])
+        map_begin = self.val['__map_']['__begin_']
+        pos = begin
+        while pos < end:
+            offset = (start + pos) % block_size
+            count = min(block_size - offset, end - pos)
+            block = (map_begin + (start + pos) // block_size).dereference()
+            yield (pos, block + offset, count)
+            pos += count
+
+    # Yield elements [BEGIN, END) block by block, fetching the part of
+    # each block that is shown with a single bulk read.
+    def bulk_children(self, decoder, begin, end):
+        for pos, pointer, count in self.blocks(begin, end):
+            for child in ScalarArrayIterator(pointer, count, decoder, pos):
+                yield child
+
+    def element_type(self):
+        pointer = self.val['__map_']['__begin_'].type.strip_typedefs().target()
+        return pointer.strip_typedefs().target()
+
     def children(self):
-        block_map = self.val['__map_']
-        return self._iterator(self.size, self.val['__block_size'],
-                              self.val['__start_'], block_map['__begin_'],
-                              block_map['__end_'])
+        begin, end = self.window_range(int(self.size))
+        if _use_bulk_read:
+            decoder = scalar_decoder(self.element_type())
+            if decoder is not None:
+                return self.bulk_children(decoder, begin, end)
+        return self._iterator(int(self.val['__block_size']),
+                              int(self.val['__start_']),
+                              self.val['__map_']['__begin_'], begin, end)
+
+    # Describe the raw storage of the elements, see
+    # StdVectorPrinter.memory_layout.
+    def memory_layout(self):
+        elttype = self.element_type()
+        size = elttype.strip_typedefs().sizeof
+        spans = ((int(pointer), count * size)
+                 for _, pointer, count in self.blocks(0, int(self.size)))
+        return (elttype, (int(self.size),), False, spans)
 
 #    def display_hint (self):
 #        return 'array'
@@ -417,13 +689,18 @@ class StdDequeIteratorPrinter:
     def to_string(self):
         return self.val['__ptr_'].dereference()
 
-class StdStackOrQueuePrinter:
+class StdStackOrQueuePrinter(ContainerPrinter):
     "Print a std::stack or std::queue"
 
     def __init__ (self, typename, val):
         self.typename = typename
         self.visualizer = gdb.default_visualizer(val['c'])
 
+    def window (self, start, count):
+        if hasattr (self.visualizer, 'window'):
+            self.visualizer.window (start, count)
+        return self
+
     def children (self):
         return self.visualizer.children()
 
@@ -435,7 +712,7 @@ class StdStackOrQueuePrinter:
             return self.visualizer.display_hint ()
         return None
 
-class StdBitsetPrinter:
+class StdBitsetPrinter(ContainerPrinter):
     "Print a std::bitset"
 
     def __init__(self, typename, val):
@@ -448,31 +725,45 @@ class StdBitsetPrinter:
 
     def children (self):
         words = self.val['__first_']
-        words_count = self.val['__n_words']
-        bits_per_word = self.val['__bits_per_word']
-        word_index = 0
+        bits_per_word = int(self.val['__bits_per_word'])
+        begin, end = self.window_range(int(self.bit_count))
+        first = begin // bits_per_word
+        last = (end + bits_per_word - 1) // bits_per_word
         result = []
 
-        while word_index < words_count:
-            bit_index = 0
-            word = words[word_index]
+        # Only the words overlapping the window are fetched.
+        if words.type.strip_typedefs().code != gdb.TYPE_CODE_ARRAY:
+            values = [int(words)][first:last]
+        else:
+            start = words[first].address
+            decoder = None
+            if _use_bulk_read and last > first:
+                decoder = scalar_decoder(start.type.strip_typedefs().target())
+            if decoder is not None:
+                values = (int(word) for _, word in
+                          ScalarArrayIterator(start, last - first, decoder))
+            else:
+                values = (int(words[i]) for i in range(first, last))
+
+        for word_index, word in enumerate(values, first):
             while word != 0:
-                if (word & 0x1) != 0:
-                    result.append(('[%d]' % (word_index * bits_per_word + bit_index), 1))
-                word >>= 1
-                bit_index += 1
-            word_index += 1
+                low = word & -word
+                bit = word_index * bits_per_word + low.bit_length() - 1
+                if begin <= bit < end:
+                    result.append(('[%d]' % bit, 1))
+                word ^= low
 
         return result
 
-class StdSetPrinter:
+class StdSetPrinter(ContainerPrinter):
     "Print a std::set or std::multiset"
 
     # Turn an RbtreeIterator into a pretty-print iterator.
     class _iterator:
-        def __init__(self, rbiter):
+        def __init__(self, rbiter, count, end):
             self.rbiter = rbiter
-            self.count = 0
+            self.count = count
+            self.end = end
 
         def __iter__(self):
             return self
@@ -481,6 +772,8 @@ class StdSetPrinter:
             return len(self.rbiter)
 
         def __next__(self):
+            if self.count == self.end:
+                raise StopIteration
             item = next(self.rbiter)
             item = item.dereference()['__value_']
             result = (('[%d]' % self.count), item)
@@ -500,46 +793,87 @@ class StdSetPrinter:
             return '%s (count=%d)' % (self.typename, int(length))
 
     def children (self):
-        return self._iterator(self.rbiter)
+        begin, end = self.window_range(len(self.rbiter))
+        rbiter = RbtreeIterator(self.val['__tree_'])
+        rbiter.skip(begin)
+        return self._iterator(rbiter, begin, end)
 
 #    def display_hint (self):
 #        return 'set'
 
+# In-order walk of a libc++ __tree.  Instead of computing successors
+# through the parent links, the walk keeps an explicit stack of the
+# nodes whose right subtrees are still to be visited, starting from
+# the root.  Each node's __left_ and __right_ links are fetched once,
+# with a single read_memory call.
 class RbtreeIterator:
     def __init__(self, rbtree):
-        self.node = rbtree['__begin_node_']
         self.size = rbtree['__pair3_']['__first_']
-        self.node_type = self.node.type
+        self.node_type = rbtree['__begin_node_'].type
+        self.root = int(rbtree['__pair1_']['__first_']['__left_'])
+        self.stack = None
         self.count = 0
 
+        nodetype = self.node_type.strip_typedefs().target()
+        pointer_size = self.node_type.strip_typedefs().sizeof
+        self.left = field_offset(nodetype, '__left_')
+        self.right = field_offset(nodetype, '__right_')
+        self.links = min(self.left, self.right)
+        self.links_size = max(self.left, self.right) + pointer_size - self.links
+        self.pointer_fmt = target_byte_order() + \
+                           {4: 'I', 8: 'Q'}.get(pointer_size, 'Q')
+        self.use_read_memory = _use_bulk_read and pointer_size in (4, 8)
+
     def __iter__(self):
         return self
 
     def __len__(self):
         return int (self.size)
 
-    def __next__(self):
+    # Return the (left, right) child addresses of the node at ADDRESS.
+    def read_links(self, address):
+        if self.use_read_memory:
+            try:
+                buf = gdb.selected_inferior().read_memory(
+                    address + self.links, self.links_size)
+            except gdb.MemoryError:
+                self.use_read_memory = False
+            else:
+                return (struct.unpack_from(self.pointer_fmt, buf,
+                                           self.left - self.links)[0],
+                        struct.unpack_from(self.pointer_fmt, buf,
+                                           self.right - self.links)[0])
+
+        node = gdb.Value(address).cast(self.node_type).dereference()
+        return (int(node['__left_']), int(node['__right_']))
+
+    # Push the node at ADDRESS and the chain of its left descendants.
+    def descend(self, address):
+        while address:
+            left, right = self.read_links(address)
+            self.stack.append((address, right))
+            address = left
+
+    # Return the address of the next node in order.
+    def next_address(self):
         if self.count == self.size:
             raise StopIteration
+        if self.stack is None:
+            self.stack = []
+            self.descend(self.root)
 
-        result = self.node
+        address, right = self.stack.pop()
+        self.descend(right)
         self.count += 1
-        if self.count < self.size:
-            # Compute the next node.
-            node = self.node
-            if node.dereference()['__right_']:
-                node = node.dereference()['__right_']
-                while node.dereference()['__left_']:
-                    node = node.dereference()['__left_']
-            else:
-                parent_node = node.dereference()['__parent_']
-                while node != parent_node.dereference()['__left_']:
-                    node = parent_node
-                    parent_node = parent_node.dereference()['__parent_']
-                node = parent_node
+        return address
 
-            self.node = node.cast(self.node_type)
-        return result
+    # Advance past COUNT nodes without handing them out.
+    def skip(self, count):
+        for i in range(count):
+            self.next_address()
+
+    def __next__(self):
+        return gdb.Value(self.next_address()).cast(self.node_type)
 
 class StdRbtreeIteratorPrinter:
     "Print std::set::iterator"
@@ -550,14 +884,15 @@ class StdRbtreeIteratorPrinter:
     def to_string (self):
         return self.val['__ptr_']['__value_']
 
-class StdMapPrinter:
+class StdMapPrinter(ContainerPrinter):
     "Print a std::map or std::multimap"
 
     # Turn an RbtreeIterator into a pretty-print iterator.
     class _iterator:
-        def __init__(self, rbiter):
+        def __init__(self, rbiter, count, end):
             self.rbiter = rbiter
-            self.count = 0
+            self.count = count
+            self.end = end
 
         def __iter__(self):
             return self
@@ -566,6 +901,8 @@ class StdMapPrinter:
             return len(self.rbiter)
 
         def __next__(self):
+            if self.count == self.end:
+                raise StopIteration
             item = next(self.rbiter)
             item = item.dereference()['__value_']
             result = ('[%d] %s' % (self.count, str(item['__cc']['first'])), item['__cc']['second'])
@@ -585,7 +922,10 @@ class StdMapPrinter:
             return '%s (count=%d)' % (self.typename, int(length))
 
     def children (self):
-        return self._iterator(self.rbiter)
+        begin, end = self.window_range(len(self.rbiter))
+        rbiter = RbtreeIterator(self.val['__tree_'])
+        rbiter.skip(begin)
+        return self._iterator(rbiter, begin, end)
 
 #    def display_hint (self):
 #        return 'map'
@@ -611,6 +951,13 @@ class HashtableIterator:
     def __len__(self):
         return self.size
 
+    # Follow COUNT links without fetching the values.
+    def skip(self, count):
+        for i in range(count):
+            if self.node == 0:
+                break
+            self.node = self.node.dereference()['__next_']
+
     def __next__ (self):
         if self.node == 0:
             raise StopIteration
@@ -639,7 +986,7 @@ class StdUnorderedMapIteratorPrinter:
         return '[%s] %s' % (self.val['__i_']['__node_']['__value_']['first'],
                             self.val['__i_']['__node_']['__value_']['second'])
 
-class UnorderedSetPrinter:
+class UnorderedSetPrinter(ContainerPrinter):
     "Print a std::unordered_set"
 
     def __init__ (self, typename, val):
@@ -663,10 +1010,13 @@ class UnorderedSetPrinter:
         return '[%d]' % i
 
     def children (self):
-        counter = map (self.format_count, itertools.count())
-        return zip (counter, self.hashtableiter)
+        begin, end = self.window_range(int(self.size))
+        hashtableiter = HashtableIterator(self.hashtable)
+        hashtableiter.skip(begin)
+        counter = map (self.format_count, itertools.count(begin))
+        return zip (counter, itertools.islice(hashtableiter, end - begin))
 
-class UnorderedMapPrinter:
+class UnorderedMapPrinter(ContainerPrinter):
     "Print a std::unordered_map"
 
     def __init__ (self, typename, val):
@@ -686,12 +1036,12 @@ class UnorderedMapPrinter:
             return '%s (count=%d)' % (self.typename, self.size)
 
     def children (self):
-        result = []
-        count = 0
-        for elt in self.hashtableiter:
-            result.append(('[%d] %s' % (count, str(elt['first'])), elt['second']))
-            count += 1
-        return result
+        begin, end = self.window_range(int(self.size))
+        hashtableiter = HashtableIterator(self.hashtable)
+        hashtableiter.skip(begin)
+        for count, elt in zip(itertools.count(begin),
+                              itertools.islice(hashtableiter, end - begin)):
+            yield ('[%d] %s' % (count, str(elt['first'])), elt['second'])
 
 #    def display_hint (self):
 #        return 'map'
@@ -718,6 +1068,8 @@ class Printer(object):
         self.name = name
         self.subprinters = []
         self.lookup = {}
+        # Subprinter (or None) resolved for each type, see __call__.
+        self.cache = {}
         self.enabled = True
         self.compiled_rx = re.compile('^([a-zA-Z0-9_:]+)<.*>$')
 
@@ -729,6 +1081,7 @@ class Printer(object):
         printer = RxPrinter(name, function)
         self.subprinters.append(printer)
         self.lookup[name] = printer
+        self.cache.clear()
 
     # Add a name using _GLIBCXX_BEGIN_NAMESPACE_VERSION.
     def add_version(self, base, name, function):
@@ -751,8 +1104,8 @@ class Printer(object):
 
         return type.tag
 
-    def __call__(self, val):
-        typename = self.get_basic_type(val.type)
+    def resolve(self, type):
+        typename = self.get_basic_type(type)
         if not typename:
             return None
 
@@ -762,12 +1115,21 @@ class Printer(object):
         if not match:
             return None
 
-        basename = match.group(1)
-        if basename in self.lookup:
-            return self.lookup[basename].invoke(val)
+        # None if there is no pretty printer for this template.
+        return self.lookup.get(match.group(1))
 
-        # Cannot find a pretty printer.  Return None.
-        return None
+    def __call__(self, val):
+        # Resolving the type is far more expensive than printing most
+        # values, so remember the outcome, including negative ones.
+        key = type_cache_key(val.type)
+        if key in self.cache:
+            subprinter = self.cache[key]
+        else:
+            subprinter = self.cache[key] = self.resolve(val.type)
+
+        if subprinter is None:
+            return None
+        return subprinter.invoke(val)
 
 libcxx_printer = None
 
@@ -862,6 +1224,40 @@ def register_type_printers(obj):
     add_one_type_printer(obj, 'discard_block_engine', 'ranlux48')
     add_one_type_printer(obj, 'shuffle_order_engine', 'knuth_b')
 
+class PrintWindowCommand(gdb.Command):
+    """Print a slice of a container.
+Usage: pwindow EXPR START COUNT
+
+Print COUNT elements of the container EXPR starting at index START.
+Random-access containers jump straight to START, node-based ones skip
+the preceding nodes without formatting them."""
+
+    def __init__ (self):
+        super(PrintWindowCommand, self).__init__('pwindow', gdb.COMMAND_DATA,
+                                                 gdb.COMPLETE_EXPRESSION)
+
+    def invoke (self, arg, from_tty):
+        argv = arg.rsplit(None, 2)
+        if len(argv) != 3:
+            raise gdb.GdbError('Usage: pwindow EXPR START COUNT')
+
+        try:
+            start, count = int(argv[1], 0), int(argv[2], 0)
+        except ValueError:
+            raise gdb.GdbError('START and COUNT must be integers')
+        if start < 0 or count < 0:
+            raise gdb.GdbError('START and COUNT must not be negative')
+
+        printer = gdb.default_visualizer(gdb.parse_and_eval(argv[0]))
+        if not hasattr(printer, 'window'):
+            raise gdb.GdbError('%s is not a libc++ container' % argv[0])
+
+        printer.window(start, count)
+        gdb.write('%s {\n' % printer.to_string())
+        for name, child in printer.children():
+            gdb.write('  %s = %s\n' % (name, child))
+        gdb.write('}\n')
+
 def register_libcxx_printers (obj):
     "Register libc++ pretty-printers with objfile Obj."
 
@@ -989,3 +1385,9 @@ def build_libcxx_dictionary ():
                             StdDequeIteratorPrinter)
 
 build_libcxx_dictionary ()
+PrintWindowCommand ()
+
+if hasattr(gdb, 'events'):
+    gdb.events.new_objfile.connect(clear_type_caches)
+    if hasattr(gdb.events, 'clear_objfiles'):
+        gdb.events.clear_objfiles.connect(clear_type_caches)
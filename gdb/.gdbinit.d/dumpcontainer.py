@@ -0,0 +1,90 @@
+class DumpContainer(gdb.Command):
+    """Write the elements of a container to a file.
+Usage: dump-container EXPR FILE
+
+Stream the elements of the std::vector, std::deque or Eigen matrix
+EXPR straight from inferior memory into FILE, a chunk at a time.  A
+FILE ending in .npy gets a NumPy header describing the element type,
+shape and storage order, any other FILE receives the raw bytes."""
+
+    chunk_size = 1 << 20
+
+    def __init__(self):
+        super(DumpContainer, self).__init__('dump-container',
+                                            gdb.COMMAND_DATA,
+                                            gdb.COMPLETE_EXPRESSION)
+
+    def invoke(self, arg, from_tty):
+        argv = arg.rsplit(None, 1)
+        if len(argv) != 2:
+            raise gdb.GdbError('Usage: dump-container EXPR FILE')
+
+        printer = gdb.default_visualizer(gdb.parse_and_eval(argv[0]))
+        layout = None
+        if hasattr(printer, 'memory_layout'):
+            layout = printer.memory_layout()
+        if layout is None:
+            raise gdb.GdbError('Cannot dump the elements of %s' % argv[0])
+
+        elttype, shape, fortran_order, spans = layout
+        path = os.path.expanduser(argv[1])
+        inferior = gdb.selected_inferior()
+
+        with open(path, 'wb') as output:
+            if path.endswith('.npy'):
+                output.write(self.npy_header(self.dtype(elttype), shape,
+                                             fortran_order))
+
+            for address, size in spans:
+                while size > 0:
+                    length = min(size, self.chunk_size)
+                    output.write(inferior.read_memory(address, length))
+                    address += length
+                    size -= length
+
+        count = 1
+        for extent in shape:
+            count *= extent
+        gdb.write('Wrote %d elements of %s to %s\n' % (count, elttype, path))
+
+    @staticmethod
+    def dtype(elttype):
+        """Return the NumPy type descriptor matching ELTTYPE."""
+        typ = elttype.strip_typedefs()
+        endian = gdb.execute('show endian', to_string=True)
+        order = '>' if 'big endian' in endian else '<'
+        if typ.sizeof == 1:
+            order = '|'
+
+        if typ.code == gdb.TYPE_CODE_FLT:
+            kind = 'f'
+        elif typ.code == gdb.TYPE_CODE_BOOL:
+            kind = 'b'
+        elif typ.code in (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_CHAR,
+                          gdb.TYPE_CODE_ENUM):
+            if hasattr(typ, 'is_signed'):
+                signed = typ.is_signed
+            else:
+                signed = int(gdb.Value(-1).cast(typ)) < 0
+            kind = 'i' if signed else 'u'
+        elif (typ.tag or '').split('<')[0] in ('std::complex',
+                                               'std::__1::complex'):
+            kind = 'c'
+        else:
+            return '|V%d' % typ.sizeof
+
+        return '%s%s%d' % (order, kind, typ.sizeof)
+
+    @staticmethod
+    def npy_header(descr, shape, fortran_order):
+        """Return a version 1.0 .npy header."""
+        header = "{'descr': '%s', 'fortran_order': %s, 'shape': %r, }" \
+            % (descr, fortran_order, tuple(shape))
+
+        # The data has to start on a 64 byte boundary.
+        header += ' ' * (-(10 + len(header) + 1) % 64) + '\n'
+        return (b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little')
+                + header.encode('latin1'))
+
+
+DumpContainer()
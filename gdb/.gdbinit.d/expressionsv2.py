@@ -1,75 +1,234 @@
+import collections
+import re
+import time
+
+
+class WatchIndex(object):
+    """Watched expressions in the order they were added, found by
+expression or by their id, numbered 1..n in that order."""
+
+    def __init__(self):
+        self.ids = collections.OrderedDict()
+        self.expressions = {}
+        self.next = 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, expression):
+        return expression in self.ids
+
+    def __iter__(self):
+        for expression, number in self.ids.items():
+            yield number, expression
+
+    def add(self, expression):
+        if expression not in self.ids:
+            self.ids[expression] = self.next
+            self.expressions[self.next] = expression
+            self.next += 1
+        return self.ids[expression]
+
+    def find(self, arg):
+        """Return the expression ARG, or the one with id ARG."""
+        if arg in self.ids:
+            return arg
+        try:
+            return self.expressions[int(arg)]
+        except (ValueError, KeyError):
+            raise KeyError(arg)
+
+    def remove(self, expression):
+        number = self.ids.pop(expression)
+        del self.expressions[number]
+        if number == self.next - 1:
+            self.next = number
+        else:
+            self.renumber()
+
+    def renumber(self):
+        """Close up the ids left by removed expressions."""
+        self.expressions.clear()
+        for number, expression in enumerate(self.ids, 1):
+            self.ids[expression] = number
+            self.expressions[number] = expression
+        self.next = len(self.ids) + 1
+
+    def clear(self):
+        self.ids.clear()
+        self.expressions.clear()
+        self.next = 1
+
+
 class Expressionsv2(Dashboard.Module):
-    """Watch user expressions."""
+    """Watch user expressions, highlighting what changed since the last
+time they were shown.
+
+Expressions show at most `element_budget` elements of any container.
+One that takes longer than `time_budget` seconds to show gets a
+smaller element budget on the following redraws, down to a single
+element, and gets it back as it shows quickly again.
+Truncated expressions end with "more…" and are shown in full once
+expanded."""
+
+    separators = re.compile(r'([\s{}\[\](),=<>]+)')
 
     def __init__(self):
-        self.number = 1
-        self.table = {}
-        self.xdict = {}
+        self.watches = WatchIndex()
 
-        self.xdict_fn = (lambda x:
-            self.xdict[x] if x in self.xdict else int(x))
+        # expression -> (frame key, generation, limit, digest, text,
+        #                truncated, rendered)
+        self.history = {}
+
+        # element budgets lowered for slow expressions, and expanded ones
+        self.budgets = {}
+        self.expanded = set()
 
     def label(self):
         return 'Expressions'
 
     def lines(self, term_width, style_changed):
         out = []
-        remap, t = {}, 1
-        titems = sorted(self.table.items())
 
-        for number, expression in titems:
+        # the highlighting has been rendered with the old style
+        if style_changed:
+            for expression, entry in self.history.items():
+                self.history[expression] = (entry[0], None) + entry[2:]
+
+        for number, expression in self.watches:
             try:
-                value = to_string(gdb.parse_and_eval(expression))
+                value = self.render(expression)
             except gdb.error as e:
                 value = ansi(e, R.style_error)
 
-            remap[number], t = t, t + 1
-            number = ansi(t - 1, R.style_selected_2)
-
+            number = ansi(number, R.style_selected_2)
             expression = ansi(expression, R.style_low)
             out.append('[{}] {} = {}'.format(number, expression, value))
 
-        del self.table, self.xdict
-        self.table, self.xdict = {}, {}
+        return out
 
-        for k, (_, v) in enumerate(titems):
-            self.table[k] = v
-            self.xdict[v] = k
+    def limit(self, expression):
+        if expression in self.expanded:
+            return None
 
-        return out
+        budget = self.budgets.get(expression, self.element_budget)
+        limit = gdb.parameter('print elements')
+        if limit and limit <= budget:
+            return None
+        return budget
+
+    def render(self, expression):
+        key = ValueCache.key(expression)[:2]
+        limit = self.limit(expression)
+        previous = self.history.get(expression)
+
+        # redraws for the same stop show the same highlighting
+        if previous is not None and \
+           previous[:3] == (key, ValueCache.generation, limit):
+            return previous[6]
+
+        # the memory behind the value did not change, nor did its text
+        shown = limit if limit is not None else gdb.parameter('print elements')
+        digest = ValueCache.digest(expression, shown or None)
+
+        start = time.time()
+
+        if previous is not None and digest is not None and \
+           previous[2:4] == (limit, digest):
+            text = rendered = previous[4]
+            truncated = previous[5]
+        else:
+            text = ValueCache.string(expression, limit)
+            rendered = text
+            if previous is not None and previous[2] == limit and \
+               previous[4] != text:
+                rendered = self.highlight(previous[4], text)
+            truncated = limit is not None and \
+                ValueCache.truncated(expression, limit)
+            if limit is not None:
+                self.adjust(expression, limit, time.time() - start)
+
+        if truncated:
+            rendered += ' ' + ansi('more…', R.style_low)
+
+        self.history[expression] = (key, ValueCache.generation, limit, digest,
+                                    text, truncated, rendered)
+        return rendered
+
+    def adjust(self, expression, limit, elapsed):
+        if elapsed > self.time_budget:
+            # still timed with one element, so that it can grow back
+            self.budgets[expression] = max(limit // 4, 1)
+        elif expression in self.budgets and elapsed * 4 < self.time_budget:
+            # four times the elements should still fit in the time budget
+            if limit * 4 >= self.element_budget:
+                del self.budgets[expression]
+            else:
+                self.budgets[expression] = limit * 4
+
+    def highlight(self, old, new):
+        old = self.separators.split(old)
+        new = self.separators.split(new)
+
+        # tokens alternate with the separators around them
+        for i in range(0, len(new), 2):
+            if new[i] and (i >= len(old) or old[i] != new[i]):
+                new[i] = ansi(new[i], R.style_selected_1)
+        return ''.join(new)
 
     def watch(self, arg):
         try:
             int(arg)
         except:
             if arg:
-                if arg in self.xdict:
-                    return
-
-                self.table[self.number] = arg
-                self.xdict[arg] = self.number
-                self.number += 1
+                self.watches.add(arg)
             else:
                 raise Exception('Specify an expression')
 
-    def unwatch(self, arg):
-        if arg:
-            try:
-                del self.table[self.xdict_fn(arg)]
-
-                if arg in self.xdict:
-                    del self.xdict[arg]
-                else:
-                    for key, value in self.xdict.items():
-                        if value == int(arg):
-                            del self.xdict[key]; return
-            except:
-                raise Exception('Expression not watched')
-        else:
+    def find(self, arg):
+        if not arg:
             raise Exception('Specify an identifier')
+        try:
+            return self.watches.find(arg)
+        except KeyError:
+            raise Exception('Expression not watched')
+
+    def unwatch(self, arg):
+        expression = self.find(arg)
+        self.watches.remove(expression)
+        self.history.pop(expression, None)
+        self.budgets.pop(expression, None)
+        self.expanded.discard(expression)
+
+    def expand(self, arg):
+        expression = self.find(arg)
+        self.expanded.add(expression)
+        self.budgets.pop(expression, None)
+
+    def watch_file(self, arg):
+        if not arg:
+            raise Exception('Specify a file')
+
+        # one expression per line, skipping blank lines and comments
+        with open(os.path.expanduser(arg)) as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    self.watch(line)
+
+    def save(self, arg):
+        if not arg:
+            raise Exception('Specify a file')
+
+        with open(os.path.expanduser(arg), 'w') as file:
+            for _, expression in self.watches:
+                file.write(expression + '\n')
 
     def clear(self, arg):
-        self.table.clear()
+        self.watches.clear()
+        self.history.clear()
+        self.budgets.clear()
+        self.expanded.clear()
 
     def commands(self):
         return {
@@ -83,8 +242,39 @@ class Expressionsv2(Dashboard.Module):
                 'doc': 'Stop watching an expression by id.',
                 'complete': gdb.COMPLETE_EXPRESSION
             },
+            'watch-file': {
+                'action': self.watch_file,
+                'doc': 'Watch the expressions listed in a file, one per line.',
+                'complete': gdb.COMPLETE_FILENAME
+            },
+            'save': {
+                'action': self.save,
+                'doc': 'Save the watched expressions to a file.',
+                'complete': gdb.COMPLETE_FILENAME
+            },
+            'expand': {
+                'action': self.expand,
+                'doc': 'Show an expression in full, by id or expression.',
+                'complete': gdb.COMPLETE_EXPRESSION
+            },
             'clear': {
                 'action': self.clear,
                 'doc': 'Clear all the watched expressions.'
             }
         }
+
+    def attributes(self):
+        return {
+            'element_budget': {
+                'doc': 'Elements of each container shown until expanded.',
+                'default': 100,
+                'type': int,
+                'check': check_gt_zero
+            },
+            'time_budget': {
+                'doc': 'Seconds an expression may take before being trimmed.',
+                'default': 0.25,
+                'type': float,
+                'check': check_gt_zero
+            }
+        }
@@ -1,14 +1,48 @@
+import errno
+import json
+import socket
+import stat
+
+
 class Sourcefile(Dashboard.Module):
-    """Show the program source code, if available."""
+    """Show the program source code, if available.
+
+The current source file is exposed as the `output_path` symlink, and
+the current line and breakpoint lines as `output_path`.data.  Setting
+`push_path` to a FIFO or a Unix datagram socket instead streams each
+change as a JSON line, for example with bin/gdb-sourcefile-listen:
+
+    {"thread":1,"file":"/src/main.cpp","line":42,"breakpoints":[10,57]}
+"""
 
     def __init__(self):
         self.file_name = None
+        self.file_exists = False
+
+        # what was last written, to skip redundant updates
+        self.written = {}
+
+        # the push channel, and what was last sent through it
+        self.channel = None
+        self.channel_path = None
+        self.sent = None
+
+        # breakpoint lines by source file, then by breakpoint number
+        self.breakpoints = {}
+        self.files = {}
+
+        for bp in gdb.breakpoints() or ():
+            self.on_breakpoint(bp)
+
+        gdb.events.breakpoint_created.connect(self.on_breakpoint)
+        gdb.events.breakpoint_modified.connect(self.on_breakpoint)
+        gdb.events.breakpoint_deleted.connect(self.on_breakpoint_deleted)
 
     def label(self):
         return 'Sourcefile'
 
     def lines(self, term_width, style_changed):
-        if self.output_path is None:
+        if self.output_path is None and self.push_path is None:
             return []
 
         # skip if the current thread is not stopped
@@ -25,54 +59,159 @@ class Sourcefile(Dashboard.Module):
         current_line = sal.line
 
         if current_line == 0:
-            if os.path.islink(self.output_path):
-                os.unlink(self.output_path)
-
-            if os.path.exists(self.output_path):
-                os.remove(self.output_path)
-
-            os.symlink(self.output_path + '.none', self.output_path)
-
-            with open(self.output_path + '.data', 'w') as file:
-                file.write("1\n")
-
+            if self.push_path is not None:
+                self.push(None, 0, [])
+            if self.output_path is not None:
+                self.update(self.output_path + '.none', "1\n")
             return []
 
         # reload the source file if changed
         file_name = sal.symtab.fullname()
 
-        bps = filter(lambda x: x.is_valid(), gdb.breakpoints())
-        bps = map(lambda x: gdb.decode_line(x.location)[1], list(bps)[1:])
+        lines = self.breakpoints.get(file_name, {})
+        bps = [x for number in sorted(lines) for x in lines[number]]
 
-        bps = [x for y in bps for x in y if x.is_valid()]
-        bps = ["%d" % x.line for x in bps if x.symtab.fullname() == file_name]
+        if self.push_path is not None:
+            self.push(file_name, current_line, bps)
+        if self.output_path is None:
+            return []
 
-        if not os.path.exists(self.output_path + '.none'):
-            with open(self.output_path + '.none', 'w') as file:
-                file.write("/* Source file unavailable... */")
+        bps = ["%d" % x for x in bps]
 
-        with open(self.output_path + '.data', 'w') as file:
-            if len(bps) > 0:
-                file.write("%d\n" % current_line + '\n'.join(bps))
-            else:
-                file.write("%d\n" % current_line)
-
-        if (file_name != self.file_name):
+        if file_name != self.file_name:
             self.file_name = file_name
+            self.file_exists = os.path.exists(file_name)
 
-            if os.path.islink(self.output_path):
-                os.unlink(self.output_path)
-
-            if os.path.exists(self.output_path):
-                os.remove(self.output_path)
+        if self.file_exists:
+            link = file_name
+        else:
+            link = self.output_path + '.none'
 
-            if os.path.exists(file_name):
-                os.symlink(self.file_name, self.output_path)
-            else:
-                os.symlink(self.output_path + '.none', self.output_path)
+        if len(bps) > 0:
+            self.update(link, "%d\n" % current_line + '\n'.join(bps))
+        else:
+            self.update(link, "%d\n" % current_line)
 
         return []
 
+    def push(self, file_name, line, bps):
+        thread = gdb.selected_thread()
+        event = {
+            'thread': getattr(thread, 'global_num', thread.num),
+            'file': file_name,
+            'line': line,
+            'breakpoints': bps
+        }
+        if event == self.sent and self.channel_path == self.push_path:
+            return
+
+        message = (json.dumps(event, separators=(',', ':')) + '\n').encode()
+        try:
+            self.open_channel()
+            if self.channel is None:
+                return
+            if isinstance(self.channel, socket.socket):
+                self.channel.send(message)
+            else:
+                os.write(self.channel, message)
+        except (OSError, socket.error) as e:
+            # nobody is listening (anymore), try again on the next step
+            self.close_channel()
+            if e.errno not in (errno.ENXIO, errno.EPIPE, errno.EAGAIN,
+                               errno.ECONNREFUSED, errno.ENOENT):
+                raise
+            return
+        self.sent = event
+
+    def open_channel(self):
+        if self.channel is not None and self.channel_path == self.push_path:
+            return
+        self.close_channel()
+
+        path = os.path.expanduser(self.push_path)
+        mode = os.stat(path).st_mode
+        if stat.S_ISFIFO(mode):
+            # fails with ENXIO as long as there is no reader
+            self.channel = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        elif stat.S_ISSOCK(mode):
+            self.channel = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.channel.setblocking(False)
+            self.channel.connect(path)
+        else:
+            raise Exception('{} is neither a FIFO nor a socket'.format(path))
+        self.channel_path = self.push_path
+
+    def close_channel(self):
+        if isinstance(self.channel, socket.socket):
+            self.channel.close()
+        elif self.channel is not None:
+            os.close(self.channel)
+        self.channel = None
+        self.sent = None
+
+    def on_breakpoint(self, bp):
+        self.on_breakpoint_deleted(bp)
+
+        # catchpoints and watchpoints have no source location, hardware
+        # breakpoints have one but older gdbs do not tell them apart
+        types = (gdb.BP_BREAKPOINT,
+                 getattr(gdb, 'BP_HARDWARE_BREAKPOINT', gdb.BP_BREAKPOINT))
+        if bp.type not in types or not bp.location:
+            return
+
+        if hasattr(bp, 'locations'):
+            sals = [(x.fullname, x.source[1]) for x in bp.locations
+                    if x.source is not None and x.fullname]
+        else:
+            try:
+                sals = gdb.decode_line(bp.location)[1] or ()
+            except gdb.error:
+                sals = ()
+            sals = [(x.symtab.fullname(), x.line) for x in sals
+                    if x.is_valid() and x.symtab is not None]
+
+        for file_name, line in sals:
+            lines = self.breakpoints.setdefault(file_name, {})
+            lines.setdefault(bp.number, []).append(line)
+        self.files[bp.number] = set(x[0] for x in sals)
+
+    def on_breakpoint_deleted(self, bp):
+        for file_name in self.files.pop(bp.number, ()):
+            lines = self.breakpoints[file_name]
+            del lines[bp.number]
+            if not lines:
+                del self.breakpoints[file_name]
+
+    def update(self, link, data):
+        # touch the files only when they would change, so that whoever
+        # watches them is not woken up on every step
+        if self.written.get('link') != (self.output_path, link):
+            if link.endswith('.none') and not os.path.exists(link):
+                with open(link, 'w') as file:
+                    file.write("/* Source file unavailable... */")
+
+            self.replace_link(self.output_path, link)
+            self.written['link'] = (self.output_path, link)
+
+        if self.written.get('data') != (self.output_path, data):
+            self.replace_file(self.output_path + '.data', data)
+            self.written['data'] = (self.output_path, data)
+
+    @staticmethod
+    def replace_file(path, data):
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp, 'w') as file:
+            file.write(data)
+        os.replace(temp, path)
+
+    @staticmethod
+    def replace_link(path, target):
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        if os.path.lexists(temp):
+            os.unlink(temp)
+        os.symlink(target, temp)
+        os.replace(temp, path)
+
     def attributes(self):
         return {
             'output_path': {
@@ -80,4 +219,9 @@ class Sourcefile(Dashboard.Module):
                 'default': None,
                 'type': str,
             },
+            'push_path': {
+                'doc': 'FIFO or Unix datagram socket to stream changes to.',
+                'default': None,
+                'type': str,
+            },
         }
@@ -0,0 +1,239 @@
+import hashlib
+
+
+class ValueCache(object):
+    """Values of expressions and their formatting, valid for a single stop.
+
+Entries are keyed by thread, frame level and expression, so redrawing
+the dashboard without running the inferior, or showing the same
+expression from several modules, evaluates and formats it only once.
+Everything is dropped as soon as the inferior runs or its memory or
+registers are changed from gdb, which also starts a new generation.
+Functions called by the expressions themselves, or by the printers that
+format them, do not count as the inferior running."""
+
+    entries = {}
+    generation = 0
+
+    # depth of the evaluations and formatting in progress
+    evaluating = 0
+
+    chunk_size = 1 << 20
+
+    # bytes hashed at most when what is printed is not a prefix of them
+    digest_cap = 1 << 16
+
+    @staticmethod
+    def key(expression):
+        thread = gdb.selected_thread()
+        try:
+            frame = gdb.selected_frame()
+        except gdb.error:
+            frame = None
+
+        level = None
+        if frame is not None:
+            if hasattr(frame, 'level'):
+                level = frame.level()
+            else:
+                level = 0
+                while frame.newer() is not None:
+                    frame = frame.newer()
+                    level += 1
+
+        return (thread.ptid if thread else None, level, expression)
+
+    @classmethod
+    def entry(cls, expression):
+        key = cls.key(expression)
+        entry = cls.entries.get(key)
+        if entry is None:
+            entry = cls.entries[key] = {}
+            cls.evaluating += 1
+            try:
+                entry['value'] = gdb.parse_and_eval(expression)
+            except gdb.error as e:
+                entry['error'] = str(e)
+            finally:
+                cls.evaluating -= 1
+
+        if 'error' in entry:
+            raise gdb.error(entry['error'])
+        return entry
+
+    @classmethod
+    def value(cls, expression):
+        """Return the value of EXPRESSION in the selected frame, raising
+gdb.error like gdb.parse_and_eval does."""
+        return cls.entry(expression)['value']
+
+    @classmethod
+    def string(cls, expression, elements=None):
+        """Return the value of EXPRESSION formatted for the dashboard,
+showing at most ELEMENTS elements of every array or container if given."""
+        entry = cls.entry(expression)
+        name = 'string' if elements is None else ('string', elements)
+        if name in entry:
+            return entry[name]
+
+        cls.evaluating += 1
+        try:
+            if elements is None:
+                entry[name] = to_string(entry['value'])
+                return entry[name]
+
+            limit = gdb.parameter('print elements')
+            gdb.execute('set print elements %d' % elements, to_string=True)
+            try:
+                entry[name] = to_string(entry['value'])
+            finally:
+                gdb.execute('set print elements %s' % (limit or 'unlimited'),
+                            to_string=True)
+            return entry[name]
+        finally:
+            cls.evaluating -= 1
+
+    @classmethod
+    def truncated(cls, expression, elements):
+        """Return whether showing at most ELEMENTS elements of every array
+or container leaves part of the value of EXPRESSION out."""
+        entry = cls.entry(expression)
+        name = ('truncated', elements)
+        if name not in entry:
+            cls.evaluating += 1
+            try:
+                entry[name] = cls.exceeds(entry['value'], elements)
+            except gdb.error:
+                # what cannot be read is not printed either
+                entry[name] = False
+            finally:
+                cls.evaluating -= 1
+        return entry[name]
+
+    @classmethod
+    def exceeds(cls, value, elements):
+        # Only what gets printed is visited: the first ELEMENTS children of
+        # each printer or array, which is what `print elements' counts.
+        printer = gdb.default_visualizer(value)
+        if printer is not None:
+            if not hasattr(printer, 'children'):
+                return False
+            for count, (_, child) in enumerate(printer.children(), 1):
+                if count > elements:
+                    return True
+                if isinstance(child, gdb.Value) and \
+                   cls.exceeds(child, elements):
+                    return True
+            return False
+
+        typ = value.type.strip_typedefs()
+        if typ.code == gdb.TYPE_CODE_ARRAY:
+            low, high = typ.range()
+            if high - low + 1 > elements:
+                return True
+            if cls.plain(typ.target()):
+                return False
+            return any(cls.exceeds(value[i], elements)
+                       for i in range(low, high + 1))
+        if typ.code in (gdb.TYPE_CODE_STRUCT, gdb.TYPE_CODE_UNION):
+            return any(cls.exceeds(value[field], elements)
+                       for field in typ.fields()
+                       if hasattr(field, 'bitpos'))
+        return False
+
+    @classmethod
+    def digest(cls, expression, elements=None):
+        """Return a digest of the memory EXPRESSION is printed from when
+showing at most ELEMENTS elements of it, or None when that memory cannot
+be told without formatting it."""
+        entry = cls.entry(expression)
+        name = ('digest', elements)
+        if name not in entry:
+            entry[name] = cls.memory_digest(entry['value'], elements)
+        return entry[name]
+
+    @staticmethod
+    def plain(typ):
+        """Whether values of TYP print as nothing but their own bytes."""
+        typ = typ.strip_typedefs()
+        if typ.code in (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_FLT,
+                        gdb.TYPE_CODE_BOOL, gdb.TYPE_CODE_ENUM,
+                        gdb.TYPE_CODE_CHAR):
+            return True
+        if typ.code == gdb.TYPE_CODE_PTR:
+            # Character pointers are printed with the string they point to.
+            target = typ.target().strip_typedefs()
+            return target.code not in (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_CHAR) \
+                or target.sizeof != 1
+        if typ.code == gdb.TYPE_CODE_ARRAY:
+            return ValueCache.plain(typ.target())
+        return False
+
+    @staticmethod
+    def prefix(spans, size):
+        """The first SIZE bytes of SPANS, (address, size) pairs."""
+        for address, length in spans:
+            if size <= 0:
+                break
+            yield address, min(length, size)
+            size -= length
+
+    @classmethod
+    def memory_digest(cls, value, elements=None):
+        if value.address is None:
+            return None
+
+        spans = [(int(value.address), value.type.strip_typedefs().sizeof)]
+        printer = gdb.default_visualizer(value)
+        if printer is not None:
+            layout = None
+            if hasattr(printer, 'memory_layout'):
+                layout = printer.memory_layout()
+            if layout is None or not cls.plain(layout[0]):
+                return None
+
+            # Only the elements printed are hashed: a vector shows the
+            # first ones, a matrix its rows or, summarized, its corners.
+            data = layout[3]
+            compact = hasattr(printer, 'compact') and printer.compact()
+            if elements is not None and not compact and \
+               sum(extent > 1 for extent in layout[1]) <= 1:
+                size = layout[0].strip_typedefs().sizeof
+                data = cls.prefix(data, elements * size)
+            elif elements is not None:
+                data = list(data)
+                if sum(size for _, size in data) > cls.digest_cap:
+                    return None
+            spans.extend(data)
+        elif not cls.plain(value.type):
+            return None
+
+        digest = hashlib.sha1(str(value.type).encode())
+        inferior = gdb.selected_inferior()
+        try:
+            for address, size in spans:
+                while size > 0:
+                    length = min(size, cls.chunk_size)
+                    digest.update(inferior.read_memory(address, length))
+                    address += length
+                    size -= length
+        except gdb.MemoryError:
+            return None
+        return digest.digest()
+
+    @classmethod
+    def invalidate(cls, event=None):
+        if cls.evaluating:
+            return
+        cls.entries.clear()
+        cls.generation += 1
+
+    @classmethod
+    def connect(cls):
+        for name in ('cont', 'exited', 'inferior_call', 'memory_changed',
+                     'register_changed', 'new_objfile'):
+            if hasattr(gdb.events, name):
+                getattr(gdb.events, name).connect(cls.invalidate)
+
+
+ValueCache.connect()
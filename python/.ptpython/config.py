@@ -13,6 +13,8 @@ from prompt_toolkit.filters import ViInsertMode
 from prompt_toolkit.filters import ViNavigationMode
 from prompt_toolkit.filters import ViWaitingForTextObjectMode
 
+from pthistory import HistoryIndex, HistoryMatcher, HistoryCompleter
+
 __all__ = ('configure',)
 
 
@@ -98,49 +100,58 @@ def configure(repl):
   def _(event):
     event.app.key_processor.feed(kp.KeyPress('^'))
 
-  if shutil.which('fzf'):
-    history_file = os.path.expanduser('~/.files/python/.ptpython/history')
-
-    def _parse_ptpython_history(path):
-      entries = []
-      current = []
-      for line in open(path):
-        if line.startswith('#'):
-          if current:
-            entries.append('\n'.join(current))
-            current = []
-        elif line.startswith('+'):
-          current.append(line[1:].rstrip('\n'))
-      if current:
-        entries.append('\n'.join(current))
-      return entries
+  # Search the history with fzf, or in-process when it is not installed.
+  history = HistoryIndex(os.path.expanduser('~/.files/python/.ptpython/history'))
+  history_fzf = shutil.which('fzf') is not None
 
+  if history_fzf:
     @repl.add_key_binding(Keys.ControlR, filter=ViInsertMode() | ViNavigationMode())
     def _(event):
-      if not os.path.exists(history_file):
-        return
-
-      entries = _parse_ptpython_history(history_file)
-      if not entries:
+      history.update()
+      if not len(history):
         return
 
-      # Use null separator so multi-line entries survive fzf
-      fzf_input = '\n'.join(
-        e.replace('\n', '  ⏎  ') for e in entries
-      )
-
+      # Stream the entries newest first, so fzf shows up right away
       try:
-        result = subprocess.run(
-          ['fzf', '--tac', '--no-sort', '--exact', '--no-multi',
+        fzf = subprocess.Popen(
+          ['fzf', '--no-sort', '--exact', '--no-multi',
            '--scheme=history', '--prompt=history> '],
-          input=fzf_input,
-          capture_output=True, text=True
+          stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
         )
       except (OSError, subprocess.SubprocessError):
         return
 
-      if result.returncode == 0 and result.stdout.rstrip('\n'):
-        selected = result.stdout.rstrip('\n').replace('  ⏎  ', '\n')
+      try:
+        for entry in history.entries():
+          fzf.stdin.write(entry.replace('\n', '  ⏎  ') + '\n')
+        fzf.stdin.close()
+      except (BrokenPipeError, OSError):
+        # fzf is done before reading all of the history
+        pass
+
+      selected = fzf.stdout.read().rstrip('\n')
+      if fzf.wait() == 0 and selected:
         buf = event.app.current_buffer
-        buf.text = selected
+        buf.text = selected.replace('  ⏎  ', '\n')
         buf.cursor_position = len(buf.text)
+
+  else:
+    # Ctrl-R turns the completions into history matches for the input,
+    # until pressed again or the input is accepted.
+    buf = repl.default_buffer
+    search = HistoryCompleter(HistoryMatcher(history), buf.completer)
+    buf.completer = search
+
+    accept_handler = buf.accept_handler
+    def _accept(buff):
+      search.active = False
+      return accept_handler(buff)
+    buf.accept_handler = _accept
+
+    @repl.add_key_binding(Keys.ControlR, filter=ViInsertMode() | ViNavigationMode())
+    def _(event):
+      search.active = not search.active
+      if search.active:
+        event.app.current_buffer.start_completion(select_first=False)
+      else:
+        event.app.current_buffer.cancel_completion()
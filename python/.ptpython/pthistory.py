@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+"""Indexed access to the ptpython history file."""
+
+import os, re, mmap, struct, array, hashlib, threading
+
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.eventloop import generator_to_async_generator
+
+
+def _parse_entry(data):
+  """Text of the history entry in DATA, without its '#' header."""
+  lines = []
+  for line in data.decode('utf-8', 'replace').split('\n'):
+    if line.startswith('+'):
+      lines.append(line[1:])
+  return '\n'.join(lines)
+
+
+class HistoryIndex(object):
+  """Offsets of the entries of a ptpython history file.
+
+  The offsets are kept in a file next to the history together with the
+  size and mtime they were computed for, so that each update only parses
+  what ptpython appended since.
+  """
+
+  header = struct.Struct('<8sQQQQ')
+  magic = b'pthist\x00\x01'
+
+  def __init__(self, path, index_path=None):
+    self.path = path
+    self.index_path = index_path or path + '.index'
+    self.inode = self.size = self.mtime = 0
+    self.offsets = array.array('Q')
+    self.loaded = False
+
+    # bumped whenever the offsets are computed from scratch
+    self.rebuilds = 0
+
+  def load(self):
+    self.loaded = True
+    try:
+      with open(self.index_path, 'rb') as file:
+        data = file.read()
+      magic, inode, size, mtime, count = self.header.unpack_from(data)
+      offsets = array.array('Q', data[self.header.size:])
+    except (OSError, struct.error, ValueError):
+      return
+    if magic != self.magic or len(offsets) != count:
+      return
+    self.inode, self.size, self.mtime = inode, size, mtime
+    self.offsets = offsets
+
+  def save(self):
+    temp = '%s.%d.tmp' % (self.index_path, os.getpid())
+    try:
+      with open(temp, 'wb') as file:
+        file.write(self.header.pack(self.magic, self.inode, self.size,
+                                    self.mtime, len(self.offsets)))
+        self.offsets.tofile(file)
+      os.replace(temp, self.index_path)
+    except OSError:
+      # a read-only home only costs a full parse next time
+      if os.path.exists(temp):
+        os.unlink(temp)
+
+  def update(self):
+    """Bring the offsets up to date with the history file."""
+    if not self.loaded:
+      self.load()
+
+    try:
+      st = os.stat(self.path)
+    except OSError:
+      self.inode = self.size = self.mtime = 0
+      del self.offsets[:]
+      self.rebuilds += 1
+      return
+    if (st.st_ino, st.st_size, st.st_mtime_ns) == \
+       (self.inode, self.size, self.mtime):
+      return
+
+    with open(self.path, 'rb') as file:
+      # ptpython only ever appends, anything else is parsed from scratch
+      start = 0
+      if st.st_ino == self.inode and st.st_size >= self.size and \
+         self.offsets:
+        start = self.offsets[-1]
+        file.seek(start)
+        if start > 0 and file.read(1) != b'#':
+          start = 0
+      if start == 0:
+        del self.offsets[:]
+        self.rebuilds += 1
+      else:
+        # the last entry may have grown, parse it again
+        self.offsets.pop()
+
+      file.seek(start)
+      data = file.read(st.st_size - start)
+
+    # entries start where the parse starts and at each '#' line
+    self.offsets.append(start)
+    position = data.find(b'\n#')
+    while position != -1:
+      self.offsets.append(start + position + 1)
+      position = data.find(b'\n#', position + 1)
+
+    self.inode, self.size, self.mtime = st.st_ino, st.st_size, st.st_mtime_ns
+    self.save()
+
+  def __len__(self):
+    return len(self.offsets)
+
+  def _map(self):
+    try:
+      with open(self.path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+      # empty, or gone since the last update
+      return None
+
+  @staticmethod
+  def _body(view, start, end):
+    # the '#' header only holds the time the entry was entered
+    if view[start:start + 1] == b'#':
+      start = view.find(b'\n', start, end) + 1 or end
+    return view[start:end].strip(b'\n')
+
+  def entries(self):
+    """Yield the non-empty entries, newest first, each only once.
+
+    The history is mapped rather than read, and an entry entered again is
+    only yielded for its most recent occurrence: what is kept in memory
+    is a short digest of each entry seen so far.
+    """
+    view = self._map() if self.size else None
+    if view is None:
+      return
+
+    seen = set()
+    try:
+      end = min(self.size, len(view))
+      for start in reversed(self.offsets):
+        if start >= end:
+          continue
+        data = self._body(view, start, end)
+        end = start
+
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        if not data or digest in seen:
+          continue
+        seen.add(digest)
+
+        text = _parse_entry(data)
+        if text:
+          yield text
+    finally:
+      view.close()
+
+  def since(self, first):
+    """Yield (number, text) for the non-empty entries from FIRST on,
+    oldest first and repeated entries included."""
+    view = self._map() if self.size else None
+    if view is None:
+      return
+
+    try:
+      size = min(self.size, len(view))
+      for number in range(first, len(self.offsets)):
+        start = self.offsets[number]
+        if start >= size:
+          break
+        end = size
+        if number + 1 < len(self.offsets):
+          end = min(self.offsets[number + 1], size)
+        text = _parse_entry(self._body(view, start, end))
+        if text:
+          yield number, text
+    finally:
+      view.close()
+
+
+class HistoryMatcher(object):
+  """Search the history without leaving the process.
+
+  Distinct entries are kept lowercased in the order they were last
+  entered, so that the most recent matches are found first and a search
+  stops as soon as it has enough of them.  Like `fzf --exact`, every word
+  of a query has to appear in an entry; only when no entry has them all
+  are the words matched as a subsequence.
+  """
+
+  def __init__(self, history):
+    self.history = history
+    self.lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    # text -> lowercased text, least recently entered first
+    self.entries = {}
+    self.count = 0
+    self.rebuilds = self.history.rebuilds
+
+  def update(self):
+    """Add what was appended to the history since the last update."""
+    with self.lock:
+      self.history.update()
+      if self.history.rebuilds != self.rebuilds:
+        self.reset()
+
+      entries = self.entries
+      for _, text in self.history.since(self.count):
+        lowered = entries.pop(text, None)
+        if lowered is None:
+          lowered = text.lower()
+          if lowered == text:
+            lowered = text
+        entries[text] = lowered
+      self.count = len(self.history)
+
+  def search(self, query, limit=100):
+    """Return the texts of the LIMIT most recent entries matching QUERY."""
+    words = query.lower().split()
+    ordered = sorted(words, key=len, reverse=True)
+    first, rest = (ordered[0], ordered[1:]) if words else ('', ())
+
+    matches = []
+    for text, lowered in reversed(self.entries.items()):
+      # the longest word rules out most entries on its own
+      if first in lowered and all(word in lowered for word in rest):
+        matches.append(text)
+        if len(matches) == limit:
+          return matches
+    if matches or not words:
+      return matches
+
+    # 'abc' as '[^a]*a[^b]*b[^c]*c', which cannot backtrack
+    pattern = re.compile(''.join('[^%s]*%s' % ((re.escape(c),) * 2)
+                                 for c in ''.join(words)))
+    for text, lowered in reversed(self.entries.items()):
+      if pattern.match(lowered):
+        matches.append(text)
+        if len(matches) == limit:
+          break
+    return matches
+
+
+class HistoryCompleter(Completer):
+  """Complete the whole input with history entries while active, and
+  with FALLBACK otherwise."""
+
+  def __init__(self, matcher, fallback):
+    self.matcher = matcher
+    self.fallback = fallback
+    self.active = False
+
+  def get_completions(self, document, complete_event):
+    if not self.active:
+      yield from self.fallback.get_completions(document, complete_event)
+      return
+
+    self.matcher.update()
+    query = document.text_before_cursor
+    for text in self.matcher.search(query):
+      yield Completion(text, start_position=-len(query),
+                       display=text.replace('\n', '  ⏎  '))
+
+  async def get_completions_async(self, document, complete_event):
+    if not self.active:
+      completions = self.fallback.get_completions_async(
+        document, complete_event)
+    else:
+      # the first search indexes the whole history, keep it off the UI
+      completions = generator_to_async_generator(
+        lambda: self.get_completions(document, complete_event))
+
+    async for completion in completions:
+      yield completion